@@ -1,23 +1,32 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from datetime import datetime
 from starlette.background import BackgroundTasks
 
-from app.db.session import get_db
+from app.db.session import get_db, get_async_db
 from app.schemas.comment import Comment, CommentCreate
-from app.crud.comment import create_comment, get_comments_by_post
-from app.api.deps import get_current_user
+from app.crud.comment import create_comment, get_comments_by_post, get_comment_tree
+from app.api.deps import get_current_user, get_current_user_optional
 from app.models.user import User
-from app.models.post import Post
-from app.models.notification import Notification
+from app.crud.notification import add_notification, coalesce_notification
+from app.core.config import settings
+from app.api.notifications import unread_count_changed
 from app.models.comment import Comment as CommentModel
-from app.core.socket_manager import manager
+from app.core.socket_manager import push_debouncer
+from app.crud.post import increment_post_counters
+from app.core.cache import invalidate_feeds
+from app.core.counters import counter_mode
+from app.crud.post_counter import increment_shard
+from app.crud.resource_version import bump_versions, post_scopes
+from app.core.etag import resource_etag, not_modified
+from app.core.pagination import NEXT_CURSOR_HEADER, encode_cursor, decode_cursor, parse_cursor_datetime
 
 router = APIRouter()
 
 async def send_notification_ws(user_id: int, message: dict):
-    await manager.send_personal_message(message, user_id)
+    await push_debouncer.push(user_id, message)
 
 @router.post("/", response_model=Comment, status_code=status.HTTP_201_CREATED)
 async def create_comment_endpoint(
@@ -25,57 +34,193 @@ async def create_comment_endpoint(
     comment: CommentCreate, 
     background_tasks: BackgroundTasks,
     parent_id: int = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    new_comment = create_comment(
-        db=db, 
-        comment=comment, 
-        post_id=post_id, 
+    # Async session: DB round trips yield to the event loop instead of
+    # blocking the worker (and its WebSockets) for their duration.
+    # One transaction: the comment, its post's comments_count, the
+    # notification and the version bumps commit together or not at all.
+    mode = counter_mode()
+    created = await db.run_sync(
+        create_comment,
+        comment=comment,
+        post_id=post_id,
         author_id=current_user.id,
-        parent_id=parent_id
+        parent_id=parent_id,
+        defer_post_counter=(mode == "sharded")
     )
-    
-    # Increment comment count
-    post = db.query(Post).filter(Post.id == post_id).first()
-    if post:
-        post.comments_count += 1
-        db.commit()
-        
-        # Notify Post Author (if not self)
-        if post.author_id != current_user.id:
-            # Create DB Notification
-            notif = Notification(
-                recipient_id=post.author_id,
+    if created is None:
+        raise HTTPException(status_code=404, detail="Post or parent comment not found")
+    new_comment, post = created["comment"], created["post"]
+
+    scopes = [f"comments:{post_id}"]
+    if mode == "sharded":
+        # Off the hot post row; the shard rollup bumps the post/feed versions
+        await db.run_sync(increment_shard, post.id, comments_count=1)
+    else:
+        scopes += post_scopes(post.id, post.department)
+
+    # Notify Post Author (if not self)
+    message = None
+    if post.author_id is not None and post.author_id != current_user.id:
+        if settings.NOTIFICATION_COALESCE:
+            # One row per post: "Asha and 3 others commented on your post"
+            grouped = await db.run_sync(
+                coalesce_notification,
+                post.author_id,
+                sender_id=current_user.id,
+                type="comment",
+                title="New Comment",
+                action="commented on your post",
+                reference_id=post.id,
+                reference_type="post"
+            )
+            message = grouped[1] if grouped else None
+        else:
+            message = f"{current_user.full_name} commented on your post"
+            await db.run_sync(
+                add_notification,
+                post.author_id,
                 sender_id=current_user.id,
                 type="comment",
                 title="New Comment",
-                message=f"{current_user.full_name} commented on your post",
+                message=message,
                 reference_id=post.id,
-                reference_type="post",
-                created_at=datetime.utcnow()
+                reference_type="post"
             )
-            db.add(notif)
-            db.commit()
-            
-            # Real-time Send
-            background_tasks.add_task(send_notification_ws, post.author_id, {
-                "type": "comment",
-                "title": "New Comment",
-                "message": f"{current_user.full_name} commented on your post",
-                "reference_id": post.id,
-                "sender": {
-                    "name": current_user.full_name,
-                    "profile_photo": current_user.profile_photo_url
-                },
-                "created_at": datetime.utcnow().isoformat()
-            })
-
-    return new_comment
+    notify = message is not None
+    if notify:
+        scopes.append(f"notifications:{post.author_id}")
+
+    await db.run_sync(bump_versions, *scopes)
+    await db.commit()
+    if mode != "sharded":
+        invalidate_feeds(post.department)
+
+    if notify:
+        # Real-time Send
+        background_tasks.add_task(send_notification_ws, post.author_id, {
+            "type": "comment",
+            "title": "New Comment",
+            "message": message,
+            "reference_id": post.id,
+            "sender": {
+                "name": current_user.full_name,
+                "profile_photo": current_user.profile_photo_url
+            },
+            "created_at": datetime.utcnow().isoformat()
+        })
+        await db.run_sync(unread_count_changed, background_tasks, post.author_id)
+
+    # Brand-new comment: no replies or reactions, so nothing to lazy-load
+    return Comment(
+        id=new_comment.id,
+        content=new_comment.content,
+        post_id=new_comment.post_id,
+        author_id=new_comment.author_id,
+        parent_id=new_comment.parent_id,
+        created_at=new_comment.created_at,
+    )
+
+# Page size caps for threaded reads
+MAX_COMMENT_PAGE = 100
+MAX_NESTED_REPLIES = 20
+
+def thread_page(
+    db: Session, response: Response, post_id: int, parent_id: Optional[int],
+    limit: int, cursor: Optional[str], replies: int, user_id: Optional[int], current_user: Optional[User]
+) -> List[dict]:
+    after = None
+    key = decode_cursor(cursor, 2)
+    if key:
+        after = (parse_cursor_datetime(key[0]), int(key[1]))
+
+    items, next_key = get_comment_tree(
+        db,
+        post_id=post_id,
+        parent_id=parent_id,
+        limit=max(1, min(limit, MAX_COMMENT_PAGE)),
+        after=after,
+        replies_per_comment=max(0, min(replies, MAX_NESTED_REPLIES)),
+        user_id=user_id,
+        voter_id=current_user.id if current_user else None,
+    )
+    if next_key:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(*next_key)
+    return items
 
 @router.get("/", response_model=List[Comment])
-def get_comments_endpoint(post_id: int, user_id: int = None, db: Session = Depends(get_db)):
-    return get_comments_by_post(db=db, post_id=post_id, user_id=user_id)
+def get_comments_endpoint(
+    post_id: int,
+    request: Request,
+    response: Response,
+    user_id: int = None,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    replies: int = 3,
+    threaded: bool = False,
+    db: Session = Depends(get_db),
+    current_user: Optional[User] = Depends(get_current_user_optional)
+):
+    """
+    Every comment of the post as one flat list (the client nests them).
+
+    `threaded=true` returns the thread built server-side instead: top-level
+    comments oldest first, `limit` per page, each with its first `replies`
+    replies nested. Pass the `X-Next-Cursor` response header back as
+    `cursor` for the next page, and a comment's `replies_cursor` to the
+    replies endpoint to load more replies.
+    """
+    # Conditional GET: 304 before loading the thread if nothing changed
+    etag = resource_etag(
+        db, [f"comments:{post_id}"],
+        str(request.url.query), current_user.id if current_user else None
+    )
+    unchanged = not_modified(request, etag)
+    if unchanged:
+        return unchanged
+    response.headers["ETag"] = etag
+
+    if not threaded:
+        return get_comments_by_post(
+            db=db,
+            post_id=post_id,
+            user_id=user_id,
+            voter_id=current_user.id if current_user else None
+        )
+    return thread_page(db, response, post_id, None, limit, cursor, replies, user_id, current_user)
+
+@router.get("/{comment_id}/replies", response_model=List[Comment])
+def get_replies_endpoint(
+    post_id: int,
+    comment_id: int,
+    request: Request,
+    response: Response,
+    user_id: int = None,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    replies: int = 3,
+    db: Session = Depends(get_db),
+    current_user: Optional[User] = Depends(get_current_user_optional)
+):
+    """
+    "Load more" for one comment: its direct replies oldest first, paginated
+    and nested the same way as the thread itself.
+    """
+    etag = resource_etag(
+        db, [f"comments:{post_id}"],
+        f"replies:{comment_id}", str(request.url.query), current_user.id if current_user else None
+    )
+    unchanged = not_modified(request, etag)
+    if unchanged:
+        return unchanged
+    response.headers["ETag"] = etag
+
+    parent = db.query(CommentModel.id).filter(CommentModel.id == comment_id, CommentModel.post_id == post_id).first()
+    if not parent:
+        raise HTTPException(status_code=404, detail="Comment not found")
+    return thread_page(db, response, post_id, comment_id, limit, cursor, replies, user_id, current_user)
 
 @router.delete("/{comment_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_comment_endpoint(
@@ -92,11 +237,20 @@ def delete_comment_endpoint(
         raise HTTPException(status_code=403, detail="Not authorized to delete this comment")
         
     db.delete(comment)
-    
-    # Decrement comment count
-    post = db.query(Post).filter(Post.id == post_id).first()
-    if post and post.comments_count > 0:
-        post.comments_count -= 1
-        
+
+    # Decrement comment count in SQL, like create_comment does
+    scopes = [f"comments:{post_id}"]
+    post = None
+    if counter_mode() == "sharded":
+        # The shard rollup bumps the post/feed versions
+        increment_shard(db, post_id, comments_count=-1)
+    else:
+        post = increment_post_counters(db, post_id, comments_count=-1)
+        if post:
+            scopes += post_scopes(post.id, post.department)
+
+    bump_versions(db, *scopes)
     db.commit()
+    if post:
+        invalidate_feeds(post.department)
     return None
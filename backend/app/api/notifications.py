@@ -1,16 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect, Query
+from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect, Query, Request, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from datetime import datetime
+from starlette.background import BackgroundTasks
 
 from app.db.session import get_db
 from app.api import deps
-from app.models.notification import Notification
 from app.models.user import User
-from app.core.socket_manager import manager
+from app.core.socket_manager import manager, push_debouncer
+from app.crud.resource_version import bump_versions
+from app.core.etag import resource_etag, not_modified
+from app.core.pagination import NEXT_CURSOR_HEADER, encode_cursor, decode_cursor, parse_cursor_datetime
+from app.core.cache import versions, unread_cache, unread_cache_key, remember_unread_count
+from app.crud.notification import (
+    create_announcement as add_announcement, get_notification_page, get_unread_count,
+    mark_notification_read, mark_all_notifications_read,
+    mark_announcement_read, mark_all_announcements_read,
+)
 
 router = APIRouter()
 
+# Page size cap for GET /notifications/
+MAX_NOTIFICATION_PAGE = 100
+
 # WebSocket Endpoint
 @router.websocket("/ws/{user_id}")
 async def websocket_endpoint(websocket: WebSocket, user_id: int):
@@ -31,69 +42,107 @@ async def websocket_endpoint(websocket: WebSocket, user_id: int):
 
 @router.get("/", response_model=List[dict])
 def get_notifications(
+    request: Request,
+    response: Response,
     skip: int = 0, 
     limit: int = 20, 
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(deps.get_current_user)
 ):
     """
-    Fetch paginated notifications for the current user.
+    Fetch paginated notifications for the current user, merged with the
+    announcements they can see (newest first). Announcements carry negative
+    ids (-announcement id) so mark_read can tell them apart.
+
+    Keyset pagination: pass the `X-Next-Cursor` response header back as
+    `cursor` for the next page. `skip` is kept for older clients and is
+    ignored once a cursor is supplied.
+    Supports conditional GET (ETag / If-None-Match).
     """
-    notifications = db.query(Notification)\
-        .filter(Notification.recipient_id == current_user.id)\
-        .order_by(Notification.created_at.desc())\
-        .offset(skip)\
-        .limit(limit)\
-        .all()
-    
-    # Transform for frontend - Include sender info
-    result = []
-    for n in notifications:
-        result.append({
-            "id": n.id,
-            "type": n.type,
-            "title": n.title,
-            "message": n.message,
-            "reference_id": n.reference_id,
-            "reference_type": n.reference_type,
-            "is_read": n.is_read,
-            "created_at": n.created_at.isoformat(),
-            "sender": {
-                "id": n.sender.id,
-                "name": n.sender.full_name,
-                "profile_photo": n.sender.profile_photo_url
-            } if n.sender else None
-        })
-    return result
+    etag = resource_etag(
+        db, [f"notifications:{current_user.id}", "announcements"],
+        str(request.url.query), current_user.id
+    )
+    unchanged = not_modified(request, etag)
+    if unchanged:
+        return unchanged
+    response.headers["ETag"] = etag
+
+    after = None
+    key = decode_cursor(cursor, 2)
+    if key:
+        try:
+            after = (parse_cursor_datetime(key[0]), int(key[1]))
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        skip = 0
+
+    items, next_key = get_notification_page(
+        db, current_user, max(1, min(limit, MAX_NOTIFICATION_PAGE)), after, max(0, skip)
+    )
+    if next_key:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(*next_key)
+    return items
+
+@router.get("/unread-count")
+def get_unread_count_endpoint(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(deps.get_current_user)
+):
+    """
+    Unread notifications and announcements, for the navbar badge. Served from
+    the per-worker cache; writes refresh it and also push the new count over
+    the WebSocket as {"type": "unread_count", "count": n}.
+    """
+    key = unread_cache_key(current_user.id)
+    count = unread_cache.get(key)
+    if count is None:
+        count = get_unread_count(db, current_user.id)
+        unread_cache.set(key, count)
+    return {"count": count}
+
+async def send_unread_count(user_id: int, count: int):
+    # Debounced: a burst of changes pushes the first and the final count
+    await push_debouncer.push(user_id, {"type": "unread_count", "count": count})
+
+def unread_count_changed(db: Session, background_tasks: BackgroundTasks, user_id: int) -> None:
+    """After a commit that changed the user's unread count: re-cache it and push it."""
+    count = get_unread_count(db, user_id)
+    remember_unread_count(user_id, count)
+    background_tasks.add_task(send_unread_count, user_id, count)
 
 @router.put("/{notification_id}/read")
 def mark_read(
     notification_id: int,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: User = Depends(deps.get_current_user)
 ):
-    notification = db.query(Notification).filter(
-        Notification.id == notification_id,
-        Notification.recipient_id == current_user.id
-    ).first()
-    
-    if not notification:
+    if notification_id < 0:
+        # Announcement (see get_notifications)
+        found = mark_announcement_read(db, current_user, -notification_id)
+    else:
+        found = mark_notification_read(db, current_user.id, notification_id)
+    if not found:
         raise HTTPException(status_code=404, detail="Notification not found")
-        
-    notification.is_read = True
+
+    bump_versions(db, f"notifications:{current_user.id}")
     db.commit()
+    unread_count_changed(db, background_tasks, current_user.id)
     return {"status": "success"}
 
 @router.put("/read-all")
 def mark_all_read(
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: User = Depends(deps.get_current_user)
 ):
-    db.query(Notification).filter(
-        Notification.recipient_id == current_user.id,
-        Notification.is_read == False
-    ).update({"is_read": True})
+    mark_all_notifications_read(db, current_user.id)
+    mark_all_announcements_read(db, current_user)
+    bump_versions(db, f"notifications:{current_user.id}")
     db.commit()
+    unread_count_changed(db, background_tasks, current_user.id)
     return {"status": "success"}
 
 @router.post("/announcement")
@@ -114,25 +163,12 @@ async def create_announcement(
              # raise HTTPException(status_code=403, detail="Not authorized")
              pass 
 
-    # 1. Create notifications for ALL users (except sender)
-    # This can be heavy, for 1000s of users, use background task
-    users = db.query(User).filter(User.id != current_user.id).all()
-    
-    notifications = []
-    for user in users:
-        n = Notification(
-            recipient_id=user.id,
-            sender_id=current_user.id,
-            type="announcement",
-            title=title,
-            message=message,
-            reference_type="announcement",
-            created_at=datetime.utcnow()
-        )
-        notifications.append(n)
-    
-    db.add_all(notifications)
+    # 1. Store the announcement once; each user's list merges it in on read,
+    # so this costs the same for 10 users or 10k
+    announcement = add_announcement(db, current_user.id, title, message)
+    bump_versions(db, "announcements")
     db.commit()
+    versions.bump("announcements")  # Retire every cached unread count in this worker
     
     # 2. Broadcast via WebSocket
     await manager.broadcast({
@@ -140,7 +176,10 @@ async def create_announcement(
         "title": title,
         "message": message,
         "sender_name": current_user.full_name,
-        "created_at": datetime.utcnow().isoformat()
+        "reference_id": announcement.id,
+        "created_at": announcement.created_at.isoformat()
     })
+    # Everyone else has one more unread; clients add it to their badge
+    await manager.broadcast({"type": "unread_count", "delta": 1}, exclude=current_user.id)
     
-    return {"status": "sent", "count": len(users)}
+    return {"status": "sent", "id": announcement.id}
@@ -1,13 +1,23 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
-from sqlalchemy.orm import Session, joinedload
+from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks, Request, Response
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.orm import Session
 from app.db.session import get_db
 from app.api.auth import get_current_user
 from app.models.user import User
 from app.models.post import Post as PostModel
 from app.schemas.post import Post, PostCreate
 from app.crud import post as crud_post
+from app.crud import search as crud_search
+from app.crud.vote import get_user_post_votes
+from app.crud.resource_version import bump_versions, post_scopes
+from app.core.etag import resource_etag, versions_token, etag_for, not_modified
 from app.core.socket_manager import manager
+from app.core.cache import feed_cache, versions, feed_scope, invalidate_feeds
+from app.core.counters import post_counter_buffer, counter_mode
+from app.crud.post_counter import increment_shard, get_shard_totals, with_shard_totals
+from app.core.jobs import flush_post_counters
+from app.core.pagination import NEXT_CURSOR_HEADER, encode_cursor, decode_cursor, parse_cursor_datetime
 
 router = APIRouter()
 
@@ -17,11 +27,29 @@ from app.api.deps import get_current_user_optional, get_current_admin
 # ... imports ...
 
 from datetime import datetime, timedelta
-from sqlalchemy import or_, desc, case, func
+from sqlalchemy import or_, desc
 import traceback
 
 # ...
 
+def feed_response(items: List[dict], next_cursor: Optional[str] = None, etag: Optional[str] = None) -> ORJSONResponse:
+    headers = {}
+    if next_cursor:
+        headers[NEXT_CURSOR_HEADER] = next_cursor
+    if etag:
+        headers["ETag"] = etag
+    return ORJSONResponse(items, headers=headers)
+
+def with_user_votes(db: Session, items: List[dict], current_user: Optional[User]) -> List[dict]:
+    """
+    Fill `user_vote` for the viewer with one query for the whole page.
+    Returns copies so cached pages are never mutated.
+    """
+    if not current_user or not items or "user_vote" not in items[0]:
+        return items
+    votes = get_user_post_votes(db, current_user.id, [item["id"] for item in items])
+    return [{**item, "user_vote": votes.get(item["id"])} for item in items]
+
 @router.get("/popular", response_model=List[Post])
 def get_popular_posts(
     timeframe: str = "today", # today, week, month, all
@@ -33,9 +61,16 @@ def get_popular_posts(
     """
     Trending Engine: Surfacing the most engaging posts based on community interaction.
     Popularity = (Net Votes) + (Comments * 2) + (Shares * 3)
+    For today/week/month the popularity is decayed by age (Post.hot_score).
     """
+    is_admin = bool(current_user and current_user.role == "admin")
+    cache_key = ("popular", versions.get("popular"), timeframe, skip, limit, is_admin)
+    cached = feed_cache.get(cache_key)
+    if cached is not None:
+        return ORJSONResponse(with_user_votes(db, cached, current_user))
+
     try:
-        query = db.query(PostModel)
+        query = crud_post.feed_query(db)
         
         # Timeframe filtering
         # Note: In a real system, we'd use DB-side time functions, 
@@ -48,80 +83,168 @@ def get_popular_posts(
         elif timeframe == "month":
             query = query.filter(PostModel.created_at >= now - timedelta(days=30))
             
-        # Popularity Weighting Logic
-        popularity_score = (PostModel.upvotes - PostModel.downvotes) + \
-                          (PostModel.comments_count * 2) + \
-                          (PostModel.share_count * 3)
+        if timeframe in ("today", "week", "month"):
+            # Windowed trending reads the stored, time-decayed hot_score
+            # (indexed) instead of scoring and sorting the whole window.
+            popularity_score = PostModel.hot_score
+        else:
+            # All-time: raw popularity, no decay
+            popularity_score = (PostModel.upvotes - PostModel.downvotes) + \
+                              (PostModel.comments_count * 2) + \
+                              (PostModel.share_count * 3)
         
         # We sort by popularity_score DESC, with Recency as tie-breaker
-        posts = query.options(joinedload(PostModel.author))\
-            .order_by(desc(popularity_score), PostModel.created_at.desc())\
+        rows = query.order_by(desc(popularity_score), PostModel.created_at.desc())\
             .offset(skip).limit(limit).all()
             
-        # Redaction for anonymous posts
-        for post in posts:
-            if post.is_anonymous:
-                if not current_user or current_user.role != "admin":
-                    post.author = None
-                    post.author_id = None
-                    
-        return posts
+        # Build response dicts straight from the rows (redacts anonymous authors)
+        items = [crud_post.feed_row_to_dict(row, reveal_anonymous=is_admin) for row in rows]
+        if counter_mode() == "sharded":
+            with_shard_totals(db, items)
+        feed_cache.set(cache_key, items)
+        return ORJSONResponse(with_user_votes(db, items, current_user))
         
     except Exception as e:
         print(f"ERROR in get_popular_posts: {e}")
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/search", response_model=List[Post])
+def search_posts(
+    response: Response,
+    q: str,
+    department: Optional[str] = None,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: Optional[User] = Depends(get_current_user_optional)
+):
+    """
+    Full-text search over title, tags and content, best match first.
+    Pass the `X-Next-Cursor` response header back as `cursor` for more.
+    """
+    after = None
+    key = decode_cursor(cursor, 2)
+    if key:
+        after = (float(key[0]), int(key[1]))
+
+    rows = crud_search.search_posts(db, q, limit=limit, department=department, after=after)
+
+    if len(rows) == limit:
+        last_post, last_rank = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last_rank, last_post.id)
+
+    posts = [post for post, _ in rows]
+    for post in posts:
+        if post.is_anonymous:
+            if not current_user or current_user.role != "admin":
+                post.author = None
+                post.author_id = None
+
+    return posts
+
 @router.get("/", response_model=List[Post])
 def read_posts(
+    request: Request,
     skip: int = 0, 
     limit: int = 100, 
     department: Optional[str] = None,
     tags: Optional[str] = None,
+    tag_mode: str = "any", # any, all
+    cursor: Optional[str] = None,
+    view: str = "full", # full, summary
+    fields: Optional[str] = None, # e.g. "id,title,excerpt,upvotes"
     db: Session = Depends(get_db),
     current_user: Optional[User] = Depends(get_current_user_optional)
 ):
+    """
+    Main feed. Pinned posts first, then newest first.
+
+    `tags` is a comma-separated list; `tag_mode=all` requires every tag,
+    otherwise any of them matches.
+
+    Pagination is keyset-based: pass the `X-Next-Cursor` response header back
+    as `cursor` to get the next page. `skip` is kept for older clients and is
+    ignored once a cursor is supplied.
+
+    `view=summary` returns a stored `excerpt` instead of the full `content`;
+    `fields` limits the response to the listed keys (id, created_at and
+    is_anonymous are always included).
+
+    Served on the fast path: projected rows, dicts built directly and encoded
+    with orjson (response_model is documentation only here).
+
+    Supports conditional GET: send the `ETag` back as `If-None-Match` and an
+    unchanged feed answers 304 without running the feed query.
+    """
+    if view not in ("full", "summary"):
+        raise HTTPException(status_code=400, detail="view must be 'full' or 'summary'")
+    requested = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+    if requested:
+        unknown = set(requested) - set(crud_post.FEED_SELECTABLE_FIELDS)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown field(s): {', '.join(sorted(unknown))}")
+    selected = crud_post.feed_fields(view, requested)
+
+    after = None
+    key = decode_cursor(cursor, 3)
+    if key:
+        after = (int(key[0]), parse_cursor_datetime(key[1]), int(key[2]))
+        skip = 0
+
+    is_admin = bool(current_user and current_user.role == "admin")
+    # One read of the feed's DB versions serves the ETag and the cache keys,
+    # so no worker serves a cached page older than the ETag it sends
+    feed_version = versions_token(db, [feed_scope(department)])
+    etag = etag_for(
+        feed_version, str(request.url.query), current_user.id if current_user else None, is_admin
+    )
+    unchanged = not_modified(request, etag)
+    if unchanged:
+        return unchanged
+
+    cache_key = (
+        "posts", feed_version,
+        department, tags, tag_mode, skip, limit, cursor, selected, is_admin
+    )
+    cached = feed_cache.get(cache_key)
+    if cached is not None:
+        items, next_cursor = cached
+        return feed_response(with_user_votes(db, items, current_user), next_cursor, etag)
+
     try:
-        query = db.query(PostModel)
-        
-        if department and department != 'ALL':
-            query = query.filter(PostModel.department == department)
-            
-        if tags:
-            query = query.filter(PostModel.tags.ilike(f"%{tags}%"))
-            
-        # Temporal Pinning Logic:
-        # A post is "effectively pinned" if is_pinned=True AND (pinned_until IS NULL OR pinned_until > now)
-        # using func.now() avoids python/db timezone mismatches
-        db_now = func.now()
-        
-        # Create a custom sort expression (1 for pinned, 0 for regular)
-        is_effectively_pinned = case(
-            (
-                (PostModel.is_pinned == True) & 
-                ((PostModel.pinned_until == None) | (PostModel.pinned_until > db_now)), 
-                1
-            ),
-            else_=0
+        # The pinned set only matters on the first pages; cache it per feed
+        pinned = None
+        if after is None or after[0]:
+            pin_key = ("pinned", feed_version, department, tags, tag_mode, selected)
+            pinned = feed_cache.get(pin_key)
+            if pinned is None:
+                pinned = crud_post.get_pinned(db, department, tags, tag_mode == "all", selected)
+                feed_cache.set(pin_key, pinned)
+
+        rows = crud_post.get_feed(
+            db,
+            limit=limit,
+            department=department,
+            tags=tags,
+            after=after,
+            skip=skip,
+            match_all_tags=(tag_mode == "all"),
+            fields=selected,
+            pinned=pinned,
         )
 
-        # Order by Effective Pin first, then Created At
-        posts = query.options(joinedload(PostModel.author))\
-            .order_by(desc(is_effectively_pinned), PostModel.created_at.desc())\
-            .offset(skip).limit(limit).all()
+        next_cursor = None
+        if len(rows) == limit:
+            last = rows[-1]
+            next_cursor = encode_cursor(last.pin_bucket, last.created_at, last.id)
 
-        # Redaction Logic
-        # For python-side comparison, we ideally need timezone aware if DB is aware.
-        # But for UI logic, we can just skip the expired cleanup visualization for now if it's complex,
-        # or safely handle it.
-        now = datetime.utcnow()
-        for post in posts:
-            if post.is_anonymous:
-                if not current_user or current_user.role != "admin":
-                   post.author = None
-                   post.author_id = None
-        
-        return posts
+        # Build response dicts straight from the rows (redacts anonymous authors)
+        items = [crud_post.feed_row_to_dict(row, selected, reveal_anonymous=is_admin) for row in rows]
+        if counter_mode() == "sharded":
+            with_shard_totals(db, items)
+        feed_cache.set(cache_key, (items, next_cursor))
+        return feed_response(with_user_votes(db, items, current_user), next_cursor, etag)
         
     except Exception as e:
         print(f"ERROR in read_posts: {e}")
@@ -156,8 +279,10 @@ def unpin_post(
     )
     db.add(log)
     
+    bump_versions(db, *post_scopes(post.id, post.department))
     db.commit()
     db.refresh(post)
+    invalidate_feeds(post.department)
     return post
 
 @router.post("/", response_model=Post, status_code=status.HTTP_201_CREATED)
@@ -184,13 +309,14 @@ def create_post(
         current_tags = post.tags.split(',') if post.tags else []
         # Filter empty strings and strip whitespace
         current_tags = [t.strip() for t in current_tags if t.strip()]
-        # Add new unique tags
+        # Add new unique tags (case-insensitive, matching the post_tags index)
         for t in auto_tags:
-            if t not in current_tags:
+            if t.lower() not in {c.lower() for c in current_tags}:
                 current_tags.append(t)
         post.tags = ",".join(current_tags)
 
     new_post = crud_post.create_post(db=db, post=post, author_id=current_user.id)
+    invalidate_feeds(new_post.department)
     
     # Broadcast new post
     # Create a simple representation for broadcast
@@ -232,9 +358,19 @@ def create_post(
 @router.get("/{post_id}", response_model=Post)
 def read_post(
     post_id: int, 
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     current_user: Optional[User] = Depends(get_current_user_optional)
 ):
+    # Conditional GET: 304 before touching the post row if nothing changed
+    is_admin = bool(current_user and current_user.role == "admin")
+    etag = resource_etag(db, [f"post:{post_id}"], current_user.id if current_user else None, is_admin)
+    unchanged = not_modified(request, etag)
+    if unchanged:
+        return unchanged
+    response.headers["ETag"] = etag
+
     db_post = crud_post.get_post(db, post_id=post_id)
     if db_post is None:
         raise HTTPException(status_code=404, detail="Post not found")
@@ -244,6 +380,14 @@ def read_post(
             db_post.author = None
             db_post.author_id = None
             
+    if counter_mode() == "sharded":
+        # Not yet rolled up shard deltas (display only, never committed)
+        for field, delta in get_shard_totals(db, [db_post.id]).get(db_post.id, {}).items():
+            setattr(db_post, field, (getattr(db_post, field) or 0) + delta)
+
+    if current_user:
+        db_post.user_vote = get_user_post_votes(db, current_user.id, [db_post.id]).get(db_post.id)
+            
     return db_post
 
 from app.models.audit_log import AuditLog
@@ -275,7 +419,9 @@ def delete_post(
              )
              db.add(log)
         
+    department = post.department
     crud_post.delete_post(db=db, post_id=post_id)
+    invalidate_feeds(department)
     return None
 
 # Simple in-memory rate limiting for shares (5 per minute per user)
@@ -287,6 +433,7 @@ share_rate_limits: dict = defaultdict(list)
 @router.patch("/{post_id}/share", status_code=status.HTTP_200_OK)
 def increment_share_count(
     post_id: int,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: Optional[User] = Depends(get_current_user_optional)
 ):
@@ -315,10 +462,30 @@ def increment_share_count(
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
     
+    mode = counter_mode()
+    if mode == "sharded":
+        # Durable but off the hot row; the shard rollup bumps versions and invalidates feeds
+        increment_shard(db, post.id, share_count=1)
+        db.commit()
+        share_rate_limits[user_key].append(current_time)
+        pending = get_shard_totals(db, [post.id]).get(post.id, {})
+        return {"share_count": (post.share_count or 0) + pending.get("share_count", 0), "message": "Share counted!"}
+
+    if mode == "write_behind":
+        # Buffered; the counter flush bumps versions and invalidates feeds
+        if post_counter_buffer.add(post.id, share_count=1):
+            background_tasks.add_task(flush_post_counters)
+        share_rate_limits[user_key].append(current_time)
+        share_count = (post.share_count or 0) + post_counter_buffer.pending(post.id)["share_count"]
+        return {"share_count": share_count, "message": "Share counted!"}
+
     # Increment share count
     post.share_count = (post.share_count or 0) + 1
+    crud_post.refresh_hot_score(post)
+    bump_versions(db, *post_scopes(post.id, post.department))
     db.commit()
     db.refresh(post)
+    invalidate_feeds(post.department)
     
     # Record this share for rate limiting
     share_rate_limits[user_key].append(current_time)
@@ -361,6 +528,8 @@ def pin_post(
     )
     db.add(log)
     
+    bump_versions(db, *post_scopes(post.id, post.department))
     db.commit()
     db.refresh(post)
+    invalidate_feeds(post.department)
     return post
@@ -1,19 +1,26 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from typing import Optional
 from app.db.session import get_db
 from app.schemas.reaction import ReactionCreate, ReactionResponse
 from app.crud.reaction import toggle_reaction
+from app.models.reaction import EMOJI_CODES
 
 router = APIRouter()
 
-@router.post("/", response_model=Optional[ReactionCreate]) # Returning created reaction or None if removed
+@router.post("/", response_model=ReactionResponse) # The toggled emoji's new count and whether the user now has it
 def toggle_reaction_endpoint(reaction: ReactionCreate, db: Session = Depends(get_db)):
+    if reaction.target_type not in ("post", "comment"):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="target_type must be 'post' or 'comment'")
+    if reaction.emoji not in EMOJI_CODES:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Unsupported emoji")
     # For now, simplistic approach. In real app, user_id comes from auth token
-    return toggle_reaction(
+    result = toggle_reaction(
         db=db,
         user_id=reaction.user_id,
         emoji=reaction.emoji,
         target_type=reaction.target_type,
         target_id=reaction.target_id
     )
+    if result is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Target not found")
+    return result
@@ -4,6 +4,7 @@ from app.db.session import get_db
 from app.models.user import User
 from app.schemas.user import UserBasic, UserBase, UserUpdate
 from app.api.deps import get_current_user
+from app.crud.resource_version import bump_versions, user_scopes
 from pydantic import BaseModel
 from typing import Optional
 
@@ -21,6 +22,8 @@ def update_user_me(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
+    shown = (current_user.username, current_user.full_name, current_user.profile_photo_url)
+
     # Update fields if provided
     if user_update.full_name is not None:
         current_user.full_name = user_update.full_name
@@ -38,6 +41,9 @@ def update_user_me(
                 raise HTTPException(status_code=400, detail="Username already taken")
             current_user.username = user_update.username
         
+    # Author names/photos are embedded in posts and notifications
+    if (current_user.username, current_user.full_name, current_user.profile_photo_url) != shown:
+        bump_versions(db, *user_scopes(db, current_user.id))
     db.commit()
     db.refresh(current_user)
     return current_user
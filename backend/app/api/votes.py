@@ -1,13 +1,19 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.db.session import get_db
-from app.models.vote import Vote, VoteType
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.session import get_async_db
 from app.models.user import User
 from app.models.post import Post
 from app.models.comment import Comment
 from app.api.deps import get_current_user
+from app.crud.vote import apply_vote, apply_votes
+from app.core.cache import invalidate_feeds
+from app.core.counters import post_counter_buffer, counter_mode
+from app.crud.post_counter import increment_shard, get_shard_totals
+from app.core.jobs import flush_post_counters
+from app.crud.resource_version import bump_versions, post_scopes
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 
 router = APIRouter()
 
@@ -18,123 +24,312 @@ class VoteRequest(BaseModel):
 
 from starlette.background import BackgroundTasks
 from app.models.notification import Notification
-from app.core.socket_manager import manager
+from app.crud.notification import add_notification, coalesce_notification
+from app.core.config import settings
+from app.api.notifications import unread_count_changed
+from app.core.socket_manager import push_debouncer
 from datetime import datetime
 
+def target_scopes(model, target) -> list:
+    """ETag scopes a vote on `target` (a counter row of `model`) changes."""
+    if model == Post:
+        return post_scopes(target.id, target.department)
+    return [f"comments:{target.post_id}"]
+
+def vote_request_error(vote_data: VoteRequest) -> Optional[str]:
+    if not vote_data.post_id and not vote_data.comment_id:
+        return "Must provide post_id or comment_id"
+    if vote_data.post_id and vote_data.comment_id:
+        return "Cannot vote on both post and comment at once"
+    if vote_data.vote_type not in [1, -1]:
+        return "Invalid vote type. Use 1 for upvote, -1 for downvote"
+    return None
+
 async def send_vote_notification(user_id: int, message: dict):
-    await manager.send_personal_message(message, user_id)
+    await push_debouncer.push(user_id, message)
 
 @router.post("/")
 async def cast_vote(
     vote_data: VoteRequest,
     background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
+    # Async session: DB round trips yield to the event loop instead of
+    # blocking the worker (and its WebSockets) for their duration.
+
     # Validation
-    if not vote_data.post_id and not vote_data.comment_id:
-        raise HTTPException(status_code=400, detail="Must provide post_id or comment_id")
-    
-    if vote_data.post_id and vote_data.comment_id:
-        raise HTTPException(status_code=400, detail="Cannot vote on both post and comment at once")
-        
-    if vote_data.vote_type not in [1, -1]:
-        raise HTTPException(status_code=400, detail="Invalid vote type. Use 1 for upvote, -1 for downvote")
+    error = vote_request_error(vote_data)
+    if error:
+        raise HTTPException(status_code=400, detail=error)
 
-    # Check existence
-    model = Post if vote_data.post_id else Comment
-    target_id = vote_data.post_id if vote_data.post_id else vote_data.comment_id
-    
-    target = db.query(model).filter(model.id == target_id).first()
-    if not target:
+    # One transaction: vote row upsert/delete plus in-SQL counter deltas
+    mode = counter_mode()
+    result = await db.run_sync(
+        apply_vote, current_user.id, vote_data.vote_type, vote_data.post_id, vote_data.comment_id,
+        mode != "inline"
+    )
+    if result is None:
         raise HTTPException(status_code=404, detail="Target not found")
 
-    # Check existing vote
-    existing_vote = db.query(Vote).filter(
-        Vote.user_id == current_user.id,
-        Vote.post_id == vote_data.post_id,
-        Vote.comment_id == vote_data.comment_id
-    ).first()
-
-    if existing_vote:
-        if existing_vote.vote_type == vote_data.vote_type:
-            # Remove vote (toggle off)
-            db.delete(existing_vote)
-            
-            # Update cache
-            if vote_data.vote_type == 1:
-                target.upvotes -= 1
-            else:
-                target.downvotes -= 1
-                
-            db.commit()
-            return {"status": "removed", "upvotes": target.upvotes, "downvotes": target.downvotes}
+    status, target = result["status"], result["target"]
+    model = Post if vote_data.post_id else Comment
+    notified_scopes = []
+    notified = []
+
+    # Notify Author (if new upvote on a Post and not self)
+    if (status == "added" and vote_data.vote_type == 1 and model == Post
+            and target.author_id and target.author_id != current_user.id):
+        message = None
+        if settings.NOTIFICATION_COALESCE:
+            # One row per post: "Asha and 23 others upvoted your post"
+            grouped = await db.run_sync(
+                coalesce_notification,
+                target.author_id,
+                sender_id=current_user.id,
+                type="upvote",
+                title="New Upvote",
+                action="upvoted your post",
+                reference_id=target.id,
+                reference_type="post"
+            )
+            if grouped:
+                message = grouped[1]
         else:
-            # Switch vote
-            old_type = existing_vote.vote_type
-            existing_vote.vote_type = vote_data.vote_type
-            
-            # Update cache
-            if old_type == 1:
-                target.upvotes -= 1
-                target.downvotes += 1
-            else:
-                target.downvotes -= 1
-                target.upvotes += 1
-            
-            db.commit()
-            return {"status": "switched", "upvotes": target.upvotes, "downvotes": target.downvotes}
-    else:
-        # Create new vote
-        new_vote = Vote(
-            user_id=current_user.id,
-            post_id=vote_data.post_id,
-            comment_id=vote_data.comment_id,
-            vote_type=vote_data.vote_type
-        )
-        db.add(new_vote)
-        
-        # Update cache
-        if vote_data.vote_type == 1:
-            target.upvotes += 1
-            
-            # Notify Author (if Post and not self)
-            if vote_data.post_id and model == Post and target.author_id != current_user.id:
-                # Check for existing notification to prevent spam
-                existing = db.query(Notification).filter(
-                    Notification.recipient_id == target.author_id,
-                    Notification.sender_id == current_user.id,
-                    Notification.type == "upvote",
-                    Notification.reference_id == target.id
-                ).first()
-                
-                if not existing:
-                    notif = Notification(
-                        recipient_id=target.author_id,
-                        sender_id=current_user.id,
-                        type="upvote",
-                        title="New Upvote",
-                        message=f"{current_user.full_name} upvoted your post",
-                        reference_id=target.id,
-                        reference_type="post",
-                        created_at=datetime.utcnow()
-                    )
-                    db.add(notif)
-                    # We commit at end, so it's fine.
-                    
-                    background_tasks.add_task(send_vote_notification, target.author_id, {
-                        "type": "upvote",
-                        "title": "New Upvote",
-                        "message": f"{current_user.full_name} upvoted your post",
-                        "reference_id": target.id,
-                        "sender": {
-                            "name": current_user.full_name
-                        },
-                        "created_at": datetime.utcnow().isoformat()
-                    })
+            # Check for existing notification to prevent spam
+            existing = (await db.execute(select(Notification.id).where(
+                Notification.recipient_id == target.author_id,
+                Notification.sender_id == current_user.id,
+                Notification.type == "upvote",
+                Notification.reference_id == target.id
+            ))).first()
+
+            if not existing:
+                message = f"{current_user.full_name} upvoted your post"
+                await db.run_sync(
+                    add_notification,
+                    target.author_id,
+                    sender_id=current_user.id,
+                    type="upvote",
+                    title="New Upvote",
+                    message=message,
+                    reference_id=target.id,
+                    reference_type="post"
+                )
+
+        if message:
+            notified_scopes.append(f"notifications:{target.author_id}")
+            notified.append(target.author_id)
+
+            background_tasks.add_task(send_vote_notification, target.author_id, {
+                "type": "upvote",
+                "title": "New Upvote",
+                "message": message,
+                "reference_id": target.id,
+                "sender": {
+                    "name": current_user.full_name
+                },
+                "created_at": datetime.utcnow().isoformat()
+            })
+
+    if result["deferred"] and mode == "sharded":
+        # Same transaction as the vote row; the shard rollup bumps versions and invalidates feeds
+        await db.run_sync(increment_shard, target.id, **result["deltas"])
+        await db.run_sync(bump_versions, *notified_scopes)
+        pending = (await db.run_sync(get_shard_totals, [target.id])).get(target.id, {})
+        await db.commit()
+        for user_id in notified:
+            await db.run_sync(unread_count_changed, background_tasks, user_id)
+        return {
+            "status": status,
+            "upvotes": (target.upvotes or 0) + pending.get("upvotes", 0),
+            "downvotes": (target.downvotes or 0) + pending.get("downvotes", 0),
+        }
 
+    if result["deferred"]:
+        # Write-behind: the counter flush bumps versions and invalidates feeds
+        await db.run_sync(bump_versions, *notified_scopes)
+        await db.commit()
+        for user_id in notified:
+            await db.run_sync(unread_count_changed, background_tasks, user_id)
+        if status != "unchanged" and post_counter_buffer.add(target.id, **result["deltas"]):
+            background_tasks.add_task(flush_post_counters)
+        pending = post_counter_buffer.pending(target.id)
+        return {
+            "status": status,
+            "upvotes": (target.upvotes or 0) + pending["upvotes"],
+            "downvotes": (target.downvotes or 0) + pending["downvotes"],
+        }
+
+    if status != "unchanged":
+        await db.run_sync(bump_versions, *target_scopes(model, target), *notified_scopes)
+    await db.commit()
+    for user_id in notified:
+        await db.run_sync(unread_count_changed, background_tasks, user_id)
+    if model == Post and status != "unchanged":
+        invalidate_feeds(target.department)
+    return {"status": status, "upvotes": target.upvotes, "downvotes": target.downvotes}
+
+MAX_BATCH_VOTES = 100
+
+@router.post("/batch")
+async def cast_votes_batch(
+    votes: List[VoteRequest],
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Apply queued votes (e.g. replayed after a reconnect) in one transaction,
+    in order, with the same toggle/switch semantics as POST /votes/.
+
+    Returns one result per item: `status` ("added", "switched", "removed",
+    "unchanged", "not_found" or "invalid") and the target's counts after the
+    whole batch. Each post author gets at most one upvote notification.
+    """
+    if len(votes) > MAX_BATCH_VOTES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_VOTES} votes per batch")
+
+    errors = {}
+    items = []
+    for i, vote_data in enumerate(votes):
+        error = vote_request_error(vote_data)
+        if error:
+            errors[i] = error
         else:
-            target.downvotes += 1
-            
-        db.commit()
-        return {"status": "added", "upvotes": target.upvotes, "downvotes": target.downvotes}
+            items.append({"post_id": vote_data.post_id, "comment_id": vote_data.comment_id, "vote_type": vote_data.vote_type})
+
+    mode = counter_mode()
+    outcome = await db.run_sync(apply_votes, current_user.id, items, mode != "inline")
+    posts, comments, post_deltas = outcome["posts"], outcome["comments"], outcome["post_deltas"]
+
+    pending = {}
+    if mode == "sharded":
+        for post_id, deltas in post_deltas.items():
+            await db.run_sync(increment_shard, post_id, **deltas)
+        pending = await db.run_sync(get_shard_totals, list(posts))
+
+    # One notification per post author, covering every post newly upvoted here
+    upvoted = {}
+    for item, result in zip(items, outcome["results"]):
+        if result["status"] == "added" and item["vote_type"] == 1 and item["post_id"]:
+            post = posts[item["post_id"]]
+            if post.author_id and post.author_id != current_user.id and post.id not in upvoted.get(post.author_id, []):
+                upvoted.setdefault(post.author_id, []).append(post.id)
+
+    notified_scopes = []
+    notified = []
+    # {author_id: (reference post id, message)} for the authors actually notified
+    messages = {}
+    if upvoted and settings.NOTIFICATION_COALESCE:
+        # Aggregation mode: fold this voter into the post's upvote row. An
+        # author upvoted on several posts gets one plain row instead, as below.
+        single = {author_id: post_ids[0] for author_id, post_ids in upvoted.items() if len(post_ids) == 1}
+        for author_id, post_id in single.items():
+            grouped = await db.run_sync(
+                coalesce_notification,
+                author_id,
+                sender_id=current_user.id,
+                type="upvote",
+                title="New Upvote",
+                action="upvoted your post",
+                reference_id=post_id,
+                reference_type="post"
+            )
+            if grouped:
+                messages[author_id] = (post_id, grouped[1])
+        for author_id, post_ids in upvoted.items():
+            if author_id in single:
+                continue
+            message = f"{current_user.full_name} upvoted {len(post_ids)} of your posts"
+            await db.run_sync(
+                add_notification,
+                author_id,
+                sender_id=current_user.id,
+                type="upvote",
+                title="New Upvote",
+                message=message,
+                reference_id=post_ids[0],
+                reference_type="post"
+            )
+            messages[author_id] = (post_ids[0], message)
+    elif upvoted:
+        # Skip posts this user already notified about, like POST /votes/ does
+        already = set((await db.execute(select(Notification.reference_id).where(
+            Notification.recipient_id.in_(list(upvoted)),
+            Notification.sender_id == current_user.id,
+            Notification.type == "upvote",
+            Notification.reference_id.in_([p for post_ids in upvoted.values() for p in post_ids])
+        ))).scalars())
+        for author_id, post_ids in upvoted.items():
+            post_ids = [p for p in post_ids if p not in already]
+            if not post_ids:
+                continue
+            if len(post_ids) == 1:
+                message = f"{current_user.full_name} upvoted your post"
+            else:
+                message = f"{current_user.full_name} upvoted {len(post_ids)} of your posts"
+            await db.run_sync(
+                add_notification,
+                author_id,
+                sender_id=current_user.id,
+                type="upvote",
+                title="New Upvote",
+                message=message,
+                reference_id=post_ids[0],
+                reference_type="post"
+            )
+            messages[author_id] = (post_ids[0], message)
+
+    for author_id, (post_id, message) in messages.items():
+        notified_scopes.append(f"notifications:{author_id}")
+        notified.append(author_id)
+        background_tasks.add_task(send_vote_notification, author_id, {
+            "type": "upvote",
+            "title": "New Upvote",
+            "message": message,
+            "reference_id": post_id,
+            "sender": {
+                "name": current_user.full_name
+            },
+            "created_at": datetime.utcnow().isoformat()
+        })
+
+    comment_scopes = [
+        f"comments:{comments[result['comment_id']].post_id}"
+        for result in outcome["results"]
+        if result["comment_id"] and result["status"] not in ("unchanged", "not_found")
+    ]
+    await db.run_sync(bump_versions, *comment_scopes, *notified_scopes)
+    await db.commit()
+    for user_id in notified:
+        await db.run_sync(unread_count_changed, background_tasks, user_id)
+    for department in outcome["departments"]:
+        invalidate_feeds(department)
+
+    if mode == "write_behind" and post_deltas:
+        flush_due = False
+        for post_id, deltas in post_deltas.items():
+            flush_due = post_counter_buffer.add(post_id, **deltas) or flush_due
+        if flush_due:
+            background_tasks.add_task(flush_post_counters)
+        pending = {post_id: post_counter_buffer.pending(post_id) for post_id in posts}
+
+    response = []
+    results = iter(outcome["results"])
+    for i, vote_data in enumerate(votes):
+        if i in errors:
+            response.append({"post_id": vote_data.post_id, "comment_id": vote_data.comment_id, "status": "invalid", "detail": errors[i]})
+            continue
+        result = next(results)
+        if result["status"] != "not_found":
+            if result["post_id"]:
+                target = posts[result["post_id"]]
+                extra = pending.get(target.id, {})
+                result["upvotes"] = (target.upvotes or 0) + extra.get("upvotes", 0)
+                result["downvotes"] = (target.downvotes or 0) + extra.get("downvotes", 0)
+            else:
+                target = comments[result["comment_id"]]
+                result["upvotes"], result["downvotes"] = target.upvotes, target.downvotes
+        response.append(result)
+    return response
@@ -0,0 +1,116 @@
+"""
+In-process caching primitives.
+
+- TTLCache: bounded LRU cache whose entries also expire after a TTL, with
+  hit/miss counters so it can be sized from /health/cache.
+- VersionCounter: per-scope change counters. Cache keys embed the current
+  version of the scopes they depend on, so a write only has to bump a
+  counter; stale entries become unreachable and age out of the LRU.
+
+State is per worker process, which is fine for data that tolerates a few
+seconds of staleness across workers.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from app.core.config import settings
+
+
+class TTLCache:
+    def __init__(self, max_entries: int, ttl: float, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] <= self.clock():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (self.clock() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+class VersionCounter:
+    def __init__(self):
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, scope: str) -> int:
+        return self._versions.get(scope, 0)
+
+    def bump(self, *scopes: Optional[str]) -> None:
+        with self._lock:
+            for scope in scopes:
+                if scope:
+                    self._versions[scope] = self._versions.get(scope, 0) + 1
+
+
+# Feed responses for /posts/ and /posts/popular
+feed_cache = TTLCache(settings.FEED_CACHE_MAX_ENTRIES, settings.FEED_CACHE_TTL_SECONDS)
+versions = VersionCounter()
+
+
+def feed_scope(department: Optional[str]) -> str:
+    return f"feed:{department}" if department and department != "ALL" else "feed:*"
+
+
+def invalidate_feeds(department: Optional[str] = None) -> None:
+    """
+    A post in `department` was created, deleted, pinned/unpinned or had its
+    counters change: the department feed, the all-departments feed and
+    trending can no longer be served from cache.
+    """
+    versions.bump("feed:*", "popular", feed_scope(department) if department else None)
+
+
+# Unread notification badge counts for GET /notifications/unread-count
+unread_cache = TTLCache(settings.UNREAD_CACHE_MAX_ENTRIES, settings.UNREAD_CACHE_TTL_SECONDS)
+
+
+def unread_cache_key(user_id: int) -> tuple:
+    return (user_id, versions.get(f"notifications:{user_id}"), versions.get("announcements"))
+
+
+def remember_unread_count(user_id: int, count: int) -> None:
+    """
+    A write changed the user's unread count to `count` (read back after its
+    commit): retire the cached value and serve the new one from now on.
+    """
+    versions.bump(f"notifications:{user_id}")
+    unread_cache.set(unread_cache_key(user_id), count)
@@ -36,6 +36,53 @@ class Settings(BaseSettings):
     GOOGLE_CLIENT_SECRET: str = ""
     GOOGLE_REDIRECT_URI: str = "http://localhost:3000/auth/callback"
     
+    # Trending (/posts/popular)
+    HOT_SCORE_GRAVITY: float = 1.8
+    HOT_SCORE_REFRESH_SECONDS: int = 300
+    
+    # Pin expiry sweeper. Feed caches and ETags are keyed on feed versions,
+    # which an expired pin only bumps when the sweeper clears it, so a post
+    # can keep showing as pinned for up to PIN_SWEEP_SECONDS after its
+    # pinned_until. That window is accepted; lower this to shrink it.
+    PIN_SWEEP_SECONDS: int = 60
+    
+    # Feed response cache (per worker)
+    FEED_CACHE_TTL_SECONDS: int = 30
+    FEED_CACHE_MAX_ENTRIES: int = 512
+
+    # Unread notification badge cache (per worker; pushes keep clients exact)
+    UNREAD_CACHE_TTL_SECONDS: int = 30
+    UNREAD_CACHE_MAX_ENTRIES: int = 10000
+
+    # Write-behind post counters (votes, shares) for viral posts
+    COUNTER_WRITE_BEHIND: bool = False
+    COUNTER_FLUSH_MS: int = 500
+    COUNTER_FLUSH_MAX_EVENTS: int = 200
+
+    # Sharded post counters (durable alternative, takes precedence); 0 = off
+    COUNTER_SHARDS: int = 0
+    COUNTER_ROLLUP_SECONDS: int = 5
+
+    # Counter reconciliation (rows checked per run = chunk size * max chunks)
+    RECONCILE_SECONDS: int = 60
+    RECONCILE_CHUNK_SIZE: int = 500
+    RECONCILE_MAX_CHUNKS: int = 10
+
+    # Notifications: one row per (recipient, type, reference) with an actor
+    # count, and at most one WebSocket push per recipient and type per window
+    NOTIFICATION_COALESCE: bool = False
+    NOTIFICATION_PUSH_WINDOW_MS: int = 2000
+
+    # Notification retention (opt-in): read notifications, and announcements
+    # read by everyone they were for, older than this are deleted (0 = keep
+    # forever); rows deleted per run = batch * max batches
+    NOTIFICATION_RETENTION_DAYS: int = 0
+    NOTIFICATION_RETENTION_SECONDS: int = 3600
+    NOTIFICATION_RETENTION_BATCH_SIZE: int = 1000
+    NOTIFICATION_RETENTION_MAX_BATCHES: int = 20
+    # Monthly partitions created ahead (PostgreSQL, see scripts/partition_notifications.py)
+    NOTIFICATION_PARTITION_MONTHS_AHEAD: int = 2
+
     # Firebase
     FIREBASE_CREDENTIALS_JSON: str | None = None
 
@@ -0,0 +1,111 @@
+"""
+Post counter write modes (counter_mode) and the write-behind buffer for hot
+post counters (upvotes, downvotes, share_count).
+
+With settings.COUNTER_WRITE_BEHIND on, cast_vote and increment_share_count
+still write their authoritative rows (votes, ...) synchronously, but the
+denormalized counter deltas are collected here and applied to `posts` in
+one batched UPDATE by flush_post_counters() (app/core/jobs.py): every
+COUNTER_FLUSH_MS, as soon as COUNTER_FLUSH_MAX_EVENTS deltas are pending,
+and once more on shutdown. A viral post then takes one row update per flush
+instead of one per request.
+
+Deltas only enter the buffer after the request's transaction committed.
+Buffers are per worker process; each worker flushes its own.
+
+The durable alternative is sharded counters (settings.COUNTER_SHARDS, see
+app/models/post_counter.py).
+"""
+import threading
+import time
+from typing import Dict, Tuple
+
+from app.core.config import settings
+
+COUNTER_FIELDS = ("upvotes", "downvotes", "comments_count", "share_count")
+
+
+def counter_mode() -> str:
+    """
+    How post counter deltas are written:
+    - "sharded": added to a random post_counters shard in the request transaction
+    - "write_behind": buffered in memory after commit, flushed in batches
+    - "inline": `posts` row updated in the request transaction (default)
+    """
+    if settings.COUNTER_SHARDS > 0:
+        return "sharded"
+    if settings.COUNTER_WRITE_BEHIND:
+        return "write_behind"
+    return "inline"
+
+
+class CounterBuffer:
+    def __init__(self, max_events: int):
+        self.max_events = max_events
+        self._deltas: Dict[int, Dict[str, int]] = {}
+        self._events = 0
+        self._lock = threading.Lock()
+        self.flushes = 0
+        self.failed_flushes = 0
+        self.flushed_events = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+
+    def add(self, post_id: int, **deltas: int) -> bool:
+        """Buffer deltas for one post. True once a flush is due (max_events pending)."""
+        with self._lock:
+            pending = self._deltas.setdefault(post_id, dict.fromkeys(COUNTER_FIELDS, 0))
+            for field, delta in deltas.items():
+                pending[field] += delta
+            self._events += 1
+            return self._events >= self.max_events
+
+    def pending(self, post_id: int) -> Dict[str, int]:
+        """Not yet flushed deltas for one post, to add to what the DB row says."""
+        with self._lock:
+            return dict(self._deltas.get(post_id) or dict.fromkeys(COUNTER_FIELDS, 0))
+
+    def drain(self) -> Tuple[Dict[int, Dict[str, int]], int]:
+        """Take everything pending; the buffer keeps filling while it is written."""
+        with self._lock:
+            deltas, events = self._deltas, self._events
+            self._deltas, self._events = {}, 0
+            return deltas, events
+
+    def restore(self, deltas: Dict[int, Dict[str, int]], events: int) -> None:
+        """Put back the deltas of a failed flush so the next one retries them."""
+        with self._lock:
+            for post_id, fields in deltas.items():
+                pending = self._deltas.setdefault(post_id, dict.fromkeys(COUNTER_FIELDS, 0))
+                for field, delta in fields.items():
+                    pending[field] += delta
+            self._events += events
+            self.failed_flushes += 1
+
+    def record_flush(self, started: float, events: int) -> None:
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self.flushes += 1
+            self.flushed_events += events
+            self.last_flush_ms = elapsed_ms
+            self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+            self._total_flush_ms += elapsed_ms
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "mode": counter_mode(),
+                "pending_posts": len(self._deltas),
+                "pending_events": self._events,
+                "max_events": self.max_events,
+                "flushes": self.flushes,
+                "failed_flushes": self.failed_flushes,
+                "flushed_events": self.flushed_events,
+                "last_flush_ms": round(self.last_flush_ms, 3),
+                "max_flush_ms": round(self.max_flush_ms, 3),
+                "avg_flush_ms": round(self._total_flush_ms / self.flushes, 3) if self.flushes else 0.0,
+            }
+
+
+post_counter_buffer = CounterBuffer(settings.COUNTER_FLUSH_MAX_EVENTS)
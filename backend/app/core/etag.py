@@ -0,0 +1,49 @@
+"""
+Conditional GET support.
+
+ETags are derived from the change counters in resource_versions (bumped on
+every write that affects a resource) plus whatever else shapes the response
+(query string, viewer). Checking one costs a primary-key lookup, so an
+unchanged resource is answered with 304 before the main query runs.
+Writes bump only the scopes they touch ("post:42", "feed:CSE"); the
+all-departments feed ("feed:*") is versioned by every department feed.
+
+The counters live in the database rather than in process memory so every
+worker agrees on them.
+"""
+import hashlib
+from typing import Iterable, Optional
+
+from fastapi import Request, Response
+from sqlalchemy.orm import Session
+
+from app.crud.resource_version import get_versions
+
+
+def versions_token(db: Session, scopes: Iterable[str]) -> str:
+    """
+    Digest of the current counters of `scopes`. The same in every worker,
+    so in-process caches keyed on it can't outlive a write made elsewhere.
+    """
+    versions = get_versions(db, scopes)
+    return hashlib.sha1(repr(sorted(versions.items())).encode()).hexdigest()
+
+
+def etag_for(token: str, *vary) -> str:
+    """Weak ETag for a response built from `token`'s versions, varying by `vary`."""
+    return f'W/"{hashlib.sha1(repr((token, vary)).encode()).hexdigest()}"'
+
+
+def resource_etag(db: Session, scopes: Iterable[str], *vary) -> str:
+    return etag_for(versions_token(db, scopes), *vary)
+
+
+def not_modified(request: Request, etag: str) -> Optional[Response]:
+    """A 304 response if the client already holds `etag`, else None."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return None
+    candidates = {c.strip() for c in header.split(",")}
+    if "*" in candidates or etag in candidates or etag[2:] in candidates:
+        return Response(status_code=304, headers={"ETag": etag})
+    return None
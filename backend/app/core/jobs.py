@@ -0,0 +1,177 @@
+"""
+Periodic maintenance jobs registered with the in-process scheduler.
+"""
+import logging
+import time
+from datetime import datetime, timedelta
+
+from app.core.cache import versions, invalidate_feeds
+from app.core.config import settings
+from app.core.counters import post_counter_buffer, counter_mode
+from app.core.scheduler import Scheduler
+from app.db import session
+
+logger = logging.getLogger(__name__)
+
+
+def refresh_hot_scores() -> None:
+    from app.crud.post import recompute_hot_scores
+
+    db = session.SessionLocal()
+    try:
+        updated = recompute_hot_scores(db)
+        versions.bump("popular")
+        logger.info(f"Hot scores refreshed for {updated} posts")
+    finally:
+        db.close()
+
+
+def sweep_expired_pins(now: datetime = None) -> None:
+    """Unpin expired posts so feeds can treat is_pinned as authoritative."""
+    from app.crud.post import expire_pins
+
+    db = session.SessionLocal()
+    try:
+        departments = expire_pins(db, now)
+    finally:
+        db.close()
+    for department in departments:
+        invalidate_feeds(department)
+    if departments:
+        logger.info(f"Expired pins swept in {len(departments)} department(s)")
+
+
+def flush_post_counters() -> None:
+    """Write buffered vote/share deltas to `posts` (write-behind mode)."""
+    from app.crud.post import apply_counter_deltas
+
+    deltas, events = post_counter_buffer.drain()
+    if not deltas:
+        return
+    started = time.perf_counter()
+    db = session.SessionLocal()
+    try:
+        departments = apply_counter_deltas(db, deltas)
+        db.commit()
+    except Exception:
+        db.rollback()
+        post_counter_buffer.restore(deltas, events)
+        raise
+    finally:
+        db.close()
+    post_counter_buffer.record_flush(started, events)
+    for department in departments:
+        invalidate_feeds(department)
+
+
+def rollup_counter_shards() -> None:
+    """Fold sharded post counters into `posts` (sharded mode)."""
+    from app.crud.post_counter import rollup_counter_shards as rollup
+
+    db = session.SessionLocal()
+    try:
+        departments = rollup(db)
+    finally:
+        db.close()
+    for department in departments:
+        invalidate_feeds(department)
+
+
+# Drift stats of the last reconciliation run, served by /health/reconcile
+last_reconcile: dict = {}
+
+
+def reconcile_counters() -> None:
+    """Check a bounded slice of post/comment counters against votes and comments."""
+    from app.crud.reconcile import reconcile_counters as reconcile
+    from app.models.post import Post
+    from app.models.comment import Comment
+
+    mode = counter_mode()
+    # Write-behind vote deltas live in worker memory the reconciler can't see
+    post_fields = ("comments_count",) if mode == "write_behind" else ("upvotes", "downvotes", "comments_count")
+    chunks = dict(chunk_size=settings.RECONCILE_CHUNK_SIZE, max_chunks=settings.RECONCILE_MAX_CHUNKS)
+
+    started = time.perf_counter()
+    db = session.SessionLocal()
+    try:
+        posts = reconcile(db, Post, post_fields, pending_shards=(mode == "sharded"), **chunks)
+        comments = reconcile(db, Comment, ("upvotes", "downvotes"), **chunks)
+    finally:
+        db.close()
+    for department in posts.pop("departments"):
+        invalidate_feeds(department)
+    comments.pop("departments")
+
+    last_reconcile.clear()
+    last_reconcile.update({
+        "finished_at": datetime.utcnow().isoformat(),
+        "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+        "posts": posts,
+        "comments": comments,
+    })
+    if posts["fixed"] or comments["fixed"]:
+        logger.warning(
+            f"Counter drift fixed: {posts['fixed']} posts {posts['drift']}, "
+            f"{comments['fixed']} comments {comments['drift']}"
+        )
+
+
+# Outcome of the last notification retention run, served by /health/retention
+last_retention: dict = {}
+
+
+def apply_notification_retention(now: datetime = None) -> None:
+    """
+    Delete read notifications and announcements past the retention period,
+    in bounded batches; on a partitioned table also create upcoming monthly
+    partitions and drop expired ones.
+    """
+    from app.crud.retention import (
+        prune_read_notifications, prune_announcements,
+        notifications_partitioned, maintain_notification_partitions,
+    )
+
+    now = now or datetime.utcnow()
+    days = settings.NOTIFICATION_RETENTION_DAYS
+    cutoff = now - timedelta(days=days) if days > 0 else None
+
+    started = time.perf_counter()
+    stats = {"cutoff": cutoff.isoformat() if cutoff else None, "notifications": 0, "recipients": 0, "announcements": 0}
+    db = session.SessionLocal()
+    try:
+        if notifications_partitioned(db):
+            stats["partitions"] = maintain_notification_partitions(
+                db, now, cutoff, settings.NOTIFICATION_PARTITION_MONTHS_AHEAD
+            )
+        if cutoff:
+            deleted, recipients = prune_read_notifications(
+                db, cutoff, settings.NOTIFICATION_RETENTION_BATCH_SIZE, settings.NOTIFICATION_RETENTION_MAX_BATCHES
+            )
+            stats["notifications"], stats["recipients"] = deleted, len(recipients)
+            stats["announcements"] = prune_announcements(db, cutoff, settings.NOTIFICATION_RETENTION_BATCH_SIZE)
+    finally:
+        db.close()
+    if stats["announcements"]:
+        versions.bump("announcements")
+
+    last_retention.clear()
+    last_retention.update({
+        "finished_at": datetime.utcnow().isoformat(),
+        "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+        **stats,
+    })
+    if stats["notifications"] or stats["announcements"] or stats.get("partitions", {}).get("dropped"):
+        logger.info(f"Notification retention: {last_retention}")
+
+
+def register_jobs(scheduler: Scheduler) -> None:
+    scheduler.add_job("hot_score_refresh", settings.HOT_SCORE_REFRESH_SECONDS, refresh_hot_scores)
+    scheduler.add_job("pin_sweeper", settings.PIN_SWEEP_SECONDS, sweep_expired_pins)
+    scheduler.add_job("counter_reconcile", settings.RECONCILE_SECONDS, reconcile_counters)
+    scheduler.add_job("notification_retention", settings.NOTIFICATION_RETENTION_SECONDS, apply_notification_retention)
+    mode = counter_mode()
+    if mode == "write_behind":
+        scheduler.add_job("counter_flush", settings.COUNTER_FLUSH_MS / 1000, flush_post_counters)
+    elif mode == "sharded":
+        scheduler.add_job("counter_rollup", settings.COUNTER_ROLLUP_SECONDS, rollup_counter_shards)
@@ -0,0 +1,63 @@
+"""
+Lightweight in-process scheduler for periodic maintenance jobs.
+
+Jobs are plain sync functions (they use the sync Session), so each run is
+pushed to the threadpool to keep the event loop free. The scheduler is
+started and stopped from the FastAPI lifespan in app/main.py.
+"""
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, List
+
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+
+Sleep = Callable[[float], Awaitable[None]]
+
+
+class PeriodicJob:
+    def __init__(self, name: str, interval: float, func: Callable[[], None], sleep: Sleep = asyncio.sleep):
+        self.name = name
+        self.interval = interval
+        self.func = func
+        self.sleep = sleep
+
+    async def run_once(self) -> None:
+        try:
+            await run_in_threadpool(self.func)
+        except Exception as e:
+            # A failing job must never take the scheduler (or the app) down
+            logger.error(f"Scheduled job '{self.name}' failed: {e}")
+
+    async def run_forever(self) -> None:
+        while True:
+            await self.sleep(self.interval)
+            await self.run_once()
+
+
+class Scheduler:
+    """`sleep` is injectable so tests can drive jobs with a fake clock."""
+
+    def __init__(self, sleep: Sleep = asyncio.sleep):
+        self.sleep = sleep
+        self.jobs: Dict[str, PeriodicJob] = {}
+        self._tasks: List[asyncio.Task] = []
+
+    def add_job(self, name: str, interval: float, func: Callable[[], None]) -> None:
+        self.jobs[name] = PeriodicJob(name, interval, func, self.sleep)
+
+    def start(self) -> None:
+        for job in self.jobs.values():
+            self._tasks.append(asyncio.create_task(job.run_forever(), name=job.name))
+            logger.info(f"Scheduled job '{job.name}' every {job.interval}s")
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+
+scheduler = Scheduler()
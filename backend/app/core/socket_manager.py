@@ -1,6 +1,9 @@
-from typing import List, Dict
+import asyncio
+from typing import List, Dict, Hashable, Optional, Tuple
 from fastapi import WebSocket
 
+from app.core.config import settings
+
 class ConnectionManager:
     def __init__(self):
         # Map user_id to list of active websockets (user might have multiple tabs)
@@ -28,12 +31,52 @@ class ConnectionManager:
                     # Handle broken pipe or stale connection
                     pass
 
-    async def broadcast(self, message: dict):
+    async def broadcast(self, message: dict, exclude: int = None):
         for user_id in self.active_connections:
+            if user_id == exclude:
+                continue
             for connection in self.active_connections[user_id]:
                 try:
                     await connection.send_json(message)
                 except Exception:
                     pass
 
+class PushDebouncer:
+    """
+    At most one message per (user, kind) per window: the first goes out
+    right away and opens the window; later ones within it replace each other,
+    and the latest is sent when the window closes (with "coalesced": how many
+    it stands for), opening the next window. A user with 500 upvotes landing
+    at once gets two pushes, not 500. Per worker process.
+    """
+    def __init__(self, manager: ConnectionManager, window_ms: int):
+        self.manager = manager
+        self.window = window_ms / 1000
+        # (user_id, kind) -> (latest held message, messages it replaces) or None if nothing is held
+        self._windows: Dict[Tuple[int, Hashable], Optional[Tuple[dict, int]]] = {}
+
+    async def push(self, user_id: int, message: dict, kind: Hashable = None):
+        key = (user_id, kind if kind is not None else message.get("type"))
+        if self.window <= 0 or user_id not in self.manager.active_connections:
+            await self.manager.send_personal_message(message, user_id)
+            return
+        if key in self._windows:
+            held = self._windows[key]
+            self._windows[key] = (message, (held[1] if held else 0) + 1)
+            return
+        self._windows[key] = None
+        await self.manager.send_personal_message(message, user_id)
+        asyncio.get_running_loop().call_later(self.window, self._close_window, key)
+
+    def _close_window(self, key):
+        held = self._windows.pop(key, None)
+        if held is None:
+            return
+        message, count = held
+        # Keep the rate bounded: the trailing send opens the next window
+        self._windows[key] = None
+        asyncio.ensure_future(self.manager.send_personal_message({**message, "coalesced": count}, key[0]))
+        asyncio.get_running_loop().call_later(self.window, self._close_window, key)
+
 manager = ConnectionManager()
+push_debouncer = PushDebouncer(manager, settings.NOTIFICATION_PUSH_WINDOW_MS)
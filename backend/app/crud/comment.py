@@ -1,44 +1,156 @@
-from sqlalchemy.orm import Session, joinedload
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import DateTime, Integer, exists, func, insert, literal, select, tuple_
+from sqlalchemy.orm import Session, aliased
 from app.models.comment import Comment
+from app.models.post import Post
 from app.schemas.comment import CommentCreate
-from app.crud.reaction import get_reaction_counts
-
-def create_comment(db: Session, comment: CommentCreate, post_id: int, author_id: int, parent_id: int = None):
-    db_comment = Comment(
-        content=comment.content,
-        post_id=post_id,
-        author_id=author_id,
-        parent_id=parent_id
-    )
-    db.add(db_comment)
-    db.commit()
-    db.refresh(db_comment)
-    return db_comment
-
-def get_comments_by_post(db: Session, post_id: int, user_id: int = None):
-    # Get all comments for post
-    comments = db.query(Comment).options(joinedload(Comment.author)).filter(Comment.post_id == post_id).order_by(Comment.created_at).all()
-    
-    # We want to return a nested structure, but Pydantic models are flat or recursive.
-    # Let's populate reactions first.
-    
-    # Optimization: Fetch all reactions for these comments in one query? 
-    # For simplicity, call get_reaction_counts loop or leave empty for now.
-    # Ideally, we enrich the objects.
-    
-    # Let's just return flat list and let frontend partial nest, 
-    # OR build tree here.
-    
-    # For now, simplistic approach: attach reactions manually
-    for c in comments:
-        c.reactions = get_reaction_counts(db, "comment", c.id, user_id)
-        c.replies = [] # Reset for recursion if needed, though SQLALchemy relations handle this lazily
-
-    # If we want detailed tree, we filter parent_id=None and let SQLAlchemy load replies.
-    # But getting reaction counts for nested replies is tricky with lazy loading.
-    
-    # Let's return the simplified list and let frontend handle threading visually via parent_id,
-    # OR creating a recursive response.
-    
-    # Better: Return all comments, let frontend build tree.
-    return comments
+from app.crud.reaction import get_reaction_counts_many
+from app.crud.vote import get_user_comment_votes
+from app.core.pagination import encode_cursor
+from app.crud.post import POST_COUNTER_COLUMNS, increment_post_counters
+
+def create_comment(
+    db: Session, comment: CommentCreate, post_id: int, author_id: int, parent_id: int = None,
+    defer_post_counter: bool = False
+) -> Optional[dict]:
+    """
+    Insert a comment and count it on its post, inside the caller's
+    transaction (the caller commits once, together with notifications):
+
+    1. INSERT ... SELECT, guarded by the post (and the parent comment, in the
+       same post) existing, RETURNING the new row.
+    2. `comments_count = comments_count + 1` on the post, RETURNING its
+       counters, author and department. With `defer_post_counter` (sharded
+       mode) the post is only read; the caller increments a counter shard.
+
+    Returns None if the post or parent does not exist, else
+    {"comment": row, "post": row}.
+    """
+    guard = [Post.id == post_id]
+    if parent_id is not None:
+        parent = aliased(Comment)
+        guard.append(exists().where(parent.id == parent_id, parent.post_id == post_id))
+
+    # INSERT ... SELECT skips Python-side column defaults, so pass them here
+    values = {
+        "content": literal(comment.content),
+        "post_id": literal(post_id),
+        "author_id": literal(author_id, Integer),
+        "parent_id": literal(parent_id, Integer),
+        "created_at": literal(datetime.utcnow(), DateTime),
+        "upvotes": literal(0),
+        "downvotes": literal(0),
+    }
+    new_comment = db.execute(
+        insert(Comment).from_select(list(values), select(*values.values()).where(*guard))
+        .returning(Comment.id, Comment.content, Comment.post_id, Comment.author_id, Comment.parent_id, Comment.created_at)
+    ).first()
+    if new_comment is None:
+        return None
+
+    if defer_post_counter:
+        post = db.execute(select(*POST_COUNTER_COLUMNS).where(Post.id == post_id)).first()
+    else:
+        post = increment_post_counters(db, post_id, comments_count=1)
+    return {"comment": new_comment, "post": post}
+
+def comment_to_dict(c: Comment, reactions: dict, votes: dict) -> dict:
+    # Plain dicts: assigning to the `reactions` / `replies` relationships of
+    # session-bound comments would be picked up as pending changes
+    return {
+        "id": c.id,
+        "content": c.content,
+        "post_id": c.post_id,
+        "author_id": c.author_id,
+        "parent_id": c.parent_id,
+        "created_at": c.created_at,
+        "replies": [],
+        "reply_count": 0,
+        "replies_cursor": None,
+        "reactions": reactions.get(c.id, []),
+        "upvotes": c.upvotes or 0,
+        "downvotes": c.downvotes or 0,
+        "user_vote": votes.get(c.id),
+    }
+
+def get_comments_by_post(db: Session, post_id: int, user_id: int = None, voter_id: int = None):
+    """Every comment of the post as a flat list (clients thread it via parent_id)."""
+    comments = db.query(Comment).filter(Comment.post_id == post_id).order_by(Comment.created_at).all()
+
+    # Reactions and the viewer's own votes for the whole thread: a fixed number
+    # of queries however long the thread is
+    reactions = get_reaction_counts_many(db, "comment", [c.id for c in comments], user_id)
+    votes = get_user_comment_votes(db, voter_id, [c.id for c in comments]) if voter_id else {}
+    return [comment_to_dict(c, reactions, votes) for c in comments]
+
+def get_first_replies(db: Session, parent_ids: List[int], per_parent: int) -> Dict[int, List[Comment]]:
+    """The first `per_parent` direct replies of each parent, in one windowed query."""
+    if not parent_ids or per_parent <= 0:
+        return {}
+    position = func.row_number().over(
+        partition_by=Comment.parent_id, order_by=(Comment.created_at, Comment.id)
+    ).label("position")
+    ranked = select(Comment.id, position).where(Comment.parent_id.in_(parent_ids)).subquery()
+    replies = db.query(Comment).join(ranked, ranked.c.id == Comment.id)\
+        .filter(ranked.c.position <= per_parent)\
+        .order_by(Comment.parent_id, Comment.created_at, Comment.id).all()
+    grouped: Dict[int, List[Comment]] = {}
+    for reply in replies:
+        grouped.setdefault(reply.parent_id, []).append(reply)
+    return grouped
+
+def get_reply_counts(db: Session, parent_ids: List[int]) -> Dict[int, int]:
+    if not parent_ids:
+        return {}
+    rows = db.query(Comment.parent_id, func.count(Comment.id))\
+        .filter(Comment.parent_id.in_(parent_ids)).group_by(Comment.parent_id).all()
+    return dict(rows)
+
+def get_comment_tree(
+    db: Session,
+    post_id: int,
+    parent_id: int = None,
+    limit: int = 20,
+    after: Tuple[datetime, int] = None,
+    replies_per_comment: int = 3,
+    user_id: int = None,
+    voter_id: int = None,
+) -> Tuple[List[dict], Optional[Tuple[datetime, int]]]:
+    """
+    One page of a thread, built server-side: the post's top-level comments
+    (or the direct replies of `parent_id`) oldest first, keyset-paginated on
+    (created_at, id) after `after`, each with its first `replies_per_comment`
+    replies nested in `replies`. Every comment carries `reply_count` and, if
+    some of its replies are nested but not all, `replies_cursor` for the
+    replies endpoint. Deeper levels are loaded the same way, one level per request,
+    so a page is at most limit * (1 + replies_per_comment) comments.
+
+    Six queries per page regardless of thread size. Returns (comments, sort
+    key of the last one if the page is full).
+    """
+    query = db.query(Comment).filter(Comment.post_id == post_id, Comment.parent_id == parent_id)
+    if after is not None:
+        query = query.filter(tuple_(Comment.created_at, Comment.id) > tuple_(*after))
+    page = query.order_by(Comment.created_at, Comment.id).limit(limit).all()
+
+    replies = get_first_replies(db, [c.id for c in page], replies_per_comment)
+    nested = [reply for c in page for reply in replies.get(c.id, [])]
+    everything = page + nested
+    ids = [c.id for c in everything]
+    counts = get_reply_counts(db, ids)
+    reactions = get_reaction_counts_many(db, "comment", ids, user_id)
+    votes = get_user_comment_votes(db, voter_id, ids) if voter_id else {}
+
+    def build(c: Comment, children: List[Comment]) -> dict:
+        item = comment_to_dict(c, reactions, votes)
+        item["reply_count"] = counts.get(c.id, 0)
+        item["replies"] = [build(child, []) for child in children]
+        if children and item["reply_count"] > len(children):
+            # Resume after the last nested reply (without one, start from the top)
+            item["replies_cursor"] = encode_cursor(children[-1].created_at, children[-1].id)
+        return item
+
+    items = [build(c, replies.get(c.id, [])) for c in page]
+    next_key = (page[-1].created_at, page[-1].id) if len(page) == limit else None
+    return items, next_key
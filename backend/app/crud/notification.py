@@ -0,0 +1,279 @@
+from datetime import datetime
+from typing import List, Optional, Tuple
+from sqlalchemy import and_, delete, exists, func, literal, or_, select, tuple_, update
+from sqlalchemy.orm import Session
+from app.db.dialect import insert_for
+from app.models.announcement import Announcement, AnnouncementRead
+from app.models.notification import Notification, NotificationActor, NotificationCounter
+from app.models.user import User
+
+def create_announcement(db: Session, sender_id: int, title: str, message: str) -> Announcement:
+    """One row however many users there are; see visible_announcements. Caller commits."""
+    announcement = Announcement(sender_id=sender_id, title=title, message=message, created_at=datetime.utcnow())
+    db.add(announcement)
+    db.flush()
+    return announcement
+
+def add_unread(db: Session, user_id: int, delta: int) -> None:
+    """`unread = unread + :delta` on the user's counter, creating it. Caller commits."""
+    insert = insert_for(db.get_bind())
+    stmt = insert(NotificationCounter).values(user_id=user_id, unread=delta)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[NotificationCounter.user_id],
+        set_={"unread": NotificationCounter.unread + stmt.excluded["unread"]},
+    )
+    db.execute(stmt)
+
+def add_notification(db: Session, recipient_id: int, **fields) -> None:
+    """Insert an unread notification and count it on the recipient's counter. Caller commits."""
+    db.add(Notification(recipient_id=recipient_id, created_at=datetime.utcnow(), **fields))
+    add_unread(db, recipient_id, 1)
+
+# Actors named in a coalesced message: "Asha, Ben and 3 others upvoted your post"
+NAMED_ACTORS = 2
+
+def actors_phrase(names: List[str], actor_count: int) -> str:
+    others = actor_count - len(names)
+    if others > 0:
+        return f"{', '.join(names)} and {others} other{'s' if others > 1 else ''}"
+    return names[0] if len(names) == 1 else f"{', '.join(names[:-1])} and {names[-1]}"
+
+def coalesce_notification(
+    db: Session, recipient_id: int, sender_id: int, type: str, title: str,
+    action: str, reference_id: int, reference_type: str
+):
+    """
+    Aggregation mode (settings.NOTIFICATION_COALESCE): one row per
+    (recipient, type, reference) instead of one per actor. The row carries
+    the number of distinct actors and names the latest few ("Asha, Ben and
+    21 others upvoted your post"); the actors themselves are kept in
+    notification_actors, so an actor coming back (A, B, then A again) is
+    not counted twice. Once read, the next actor starts a fresh unread
+    group with a count of 1.
+
+    The group row is upserted first, which locks it until commit, so
+    concurrent actors on the same group apply one at a time.
+
+    Returns (actor_count, message), or None if nothing changed. Adjusts the
+    unread counter when the row becomes unread. Caller commits.
+    """
+    now = datetime.utcnow()
+    insert = insert_for(db.get_bind())
+    stmt = insert(Notification).values(
+        recipient_id=recipient_id,
+        sender_id=sender_id,
+        type=type,
+        title=title,
+        message="",
+        reference_id=reference_id,
+        reference_type=reference_type,
+        is_read=False,
+        actor_count=0,
+        group_key=f"{type}:{reference_type}:{reference_id}",
+        created_at=now
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Notification.recipient_id, Notification.group_key],
+        set_={"group_key": stmt.excluded.group_key},
+    )
+    group = db.execute(stmt.returning(Notification.id, Notification.is_read, Notification.actor_count)).one()
+
+    if group.is_read:
+        db.execute(delete(NotificationActor).where(NotificationActor.notification_id == group.id))
+    added = db.execute(
+        insert(NotificationActor).values(notification_id=group.id, actor_id=sender_id, acted_at=now)
+        .on_conflict_do_nothing().returning(NotificationActor.actor_id)
+    ).first()
+    if added is None:
+        # Already one of this group's actors
+        return None
+
+    names = db.execute(
+        select(func.coalesce(User.full_name, User.username))
+        .select_from(NotificationActor).join(User, User.id == NotificationActor.actor_id)
+        .where(NotificationActor.notification_id == group.id)
+        .order_by(NotificationActor.acted_at.desc()).limit(NAMED_ACTORS)
+    ).scalars().all()
+    actor_count = 1 if group.is_read else group.actor_count + 1
+    message = f"{actors_phrase(names, actor_count)} {action}"
+    db.execute(
+        update(Notification).where(Notification.id == group.id).values(
+            sender_id=sender_id, message=message, actor_count=actor_count, is_read=False, created_at=now
+        ).execution_options(synchronize_session=False)
+    )
+    if group.is_read or not group.actor_count:
+        # New row, or a read one that is unread again
+        add_unread(db, recipient_id, 1)
+    return actor_count, message
+
+def mark_notification_read(db: Session, user_id: int, notification_id: int) -> bool:
+    """Mark one of the user's notifications read. False if it isn't theirs. Caller commits."""
+    marked = db.execute(
+        update(Notification).where(
+            Notification.id == notification_id,
+            Notification.recipient_id == user_id,
+            Notification.is_read.isnot(True)
+        ).values(is_read=True).execution_options(synchronize_session=False)
+    ).rowcount
+    if marked:
+        add_unread(db, user_id, -marked)
+        return True
+    # Nothing updated: already read, or not the user's notification
+    return db.query(exists().where(Notification.id == notification_id, Notification.recipient_id == user_id)).scalar()
+
+def mark_all_notifications_read(db: Session, user_id: int) -> int:
+    """
+    Mark all of the user's notifications read. The counter drops by the
+    rows actually updated, so notifications inserted meanwhile stay counted.
+    Caller commits.
+    """
+    marked = db.execute(
+        update(Notification).where(
+            Notification.recipient_id == user_id,
+            Notification.is_read.isnot(True)
+        ).values(is_read=True).execution_options(synchronize_session=False)
+    ).rowcount
+    if marked:
+        add_unread(db, user_id, -marked)
+    return marked
+
+def get_unread_count(db: Session, user_id: int) -> int:
+    """
+    Badge count in one statement: the user's counter plus their unread
+    announcements (announcements are not fanned out, so not counted per user).
+    """
+    counter = select(NotificationCounter.unread)\
+        .where(NotificationCounter.user_id == user_id).scalar_subquery()
+    joined_at = select(User.created_at).where(User.id == user_id).scalar_subquery()
+    announcements = select(func.count(Announcement.id)).where(
+        visible_announcements(user_id, joined_at), ~announcement_is_read(user_id)
+    ).scalar_subquery()
+    unread, unread_announcements = db.execute(select(func.coalesce(counter, 0), announcements)).one()
+    return max(unread, 0) + unread_announcements
+
+def rebuild_unread_counters(db: Session) -> int:
+    """Recompute notification_counters from the notifications table (backfill/repair). Caller commits."""
+    db.execute(NotificationCounter.__table__.delete())
+    rows = db.query(Notification.recipient_id, func.count(Notification.id))\
+        .filter(Notification.recipient_id.isnot(None), Notification.is_read.isnot(True))\
+        .group_by(Notification.recipient_id).all()
+    if rows:
+        db.execute(NotificationCounter.__table__.insert(), [
+            {"user_id": user_id, "unread": unread} for user_id, unread in rows
+        ])
+    return len(rows)
+
+def visible_announcements(user_id: int, joined_at=None):
+    """
+    Criteria for the announcements in a user's list: made since they joined
+    (`joined_at`, a value or a SQL expression), not by them.
+    """
+    criteria = [or_(Announcement.sender_id.is_(None), Announcement.sender_id != user_id)]
+    if joined_at is not None:
+        criteria.append(Announcement.created_at >= joined_at)
+    return and_(*criteria)
+
+def announcement_is_read(user_id: int):
+    return exists().where(
+        AnnouncementRead.user_id == user_id,
+        AnnouncementRead.announcement_id == Announcement.id
+    )
+
+# Sender fields, joined into the projected rows below
+SENDER_COLUMNS = (
+    User.id.label("sender_user_id"),
+    User.full_name.label("sender_name"),
+    User.profile_photo_url.label("sender_photo"),
+)
+
+def notification_row_to_dict(row) -> dict:
+    return {
+        "id": row.id,
+        "type": row.type,
+        "title": row.title,
+        "message": row.message,
+        "reference_id": row.reference_id,
+        "reference_type": row.reference_type,
+        "is_read": bool(row.is_read),
+        "created_at": row.created_at.isoformat(),
+        "actor_count": row.actor_count or 1,
+        "sender": {
+            "id": row.sender_user_id,
+            "name": row.sender_name,
+            "profile_photo": row.sender_photo
+        } if row.sender_user_id is not None else None
+    }
+
+def get_notification_page(
+    db: Session, user: User, limit: int, after: Optional[Tuple[datetime, int]] = None, skip: int = 0
+) -> Tuple[List[dict], Optional[Tuple[datetime, int]]]:
+    """
+    One page of the user's notifications merged with their announcements,
+    newest first by (created_at, id). Announcements carry negative ids
+    (-announcement id), which also orders them after notifications with the
+    same timestamp. Each source is one projected, keyset-paginated query
+    with senders joined in. Returns (items, key of the last item if more
+    follow). `skip` is for offset-paginated clients and is applied after
+    the merge.
+    """
+    fetch = skip + limit + 1
+
+    notifications = select(
+        Notification.id, Notification.type, Notification.title, Notification.message,
+        Notification.reference_id, Notification.reference_type, Notification.is_read,
+        Notification.created_at, Notification.actor_count, *SENDER_COLUMNS
+    ).outerjoin(User, User.id == Notification.sender_id)\
+        .where(Notification.recipient_id == user.id)
+    announcements = select(
+        (-Announcement.id).label("id"), literal("announcement").label("type"),
+        Announcement.title, Announcement.message, Announcement.id.label("reference_id"),
+        literal("announcement").label("reference_type"), announcement_is_read(user.id).label("is_read"),
+        Announcement.created_at, literal(1).label("actor_count"), *SENDER_COLUMNS
+    ).outerjoin(User, User.id == Announcement.sender_id)\
+        .where(visible_announcements(user.id, user.created_at))
+    if after:
+        created_at, last_id = after
+        # Served by ix_notifications_recipient_id_created_at_id
+        notifications = notifications.where(tuple_(Notification.created_at, Notification.id) < tuple_(created_at, last_id))
+        announcements = announcements.where(or_(
+            Announcement.created_at < created_at,
+            and_(Announcement.created_at == created_at, -Announcement.id < last_id)
+        ))
+
+    rows = db.execute(
+        notifications.order_by(Notification.created_at.desc(), Notification.id.desc()).limit(fetch)
+    ).all()
+    rows += db.execute(
+        announcements.order_by(Announcement.created_at.desc(), Announcement.id.asc()).limit(fetch)
+    ).all()
+    rows.sort(key=lambda row: (row.created_at, row.id), reverse=True)
+
+    page = rows[skip:skip + limit]
+    next_key = (page[-1].created_at, page[-1].id) if len(rows) > skip + limit else None
+    return [notification_row_to_dict(row) for row in page], next_key
+
+def mark_announcement_read(db: Session, user: User, announcement_id: int) -> bool:
+    """Record the read mark. False if the user can't see that announcement. Caller commits."""
+    insert = insert_for(db.get_bind())
+    marked = db.execute(
+        insert(AnnouncementRead).from_select(
+            ["user_id", "announcement_id", "read_at"],
+            select(literal(user.id), Announcement.id, literal(datetime.utcnow()))
+            .where(Announcement.id == announcement_id, visible_announcements(user.id, user.created_at))
+        ).on_conflict_do_nothing()
+    )
+    if marked.rowcount:
+        return True
+    # Nothing inserted: already read, or not one of the user's announcements
+    return db.query(exists().where(Announcement.id == announcement_id, visible_announcements(user.id, user.created_at))).scalar()
+
+def mark_all_announcements_read(db: Session, user: User) -> int:
+    """Read marks for all of the user's unread announcements, in one INSERT ... SELECT. Caller commits."""
+    insert = insert_for(db.get_bind())
+    return db.execute(
+        insert(AnnouncementRead).from_select(
+            ["user_id", "announcement_id", "read_at"],
+            select(literal(user.id), Announcement.id, literal(datetime.utcnow()))
+            .where(visible_announcements(user.id, user.created_at), ~announcement_is_read(user.id))
+        ).on_conflict_do_nothing()
+    ).rowcount
@@ -1,6 +1,17 @@
+from datetime import datetime, timedelta
+from functools import lru_cache
 from sqlalchemy.orm import Session
+from sqlalchemy import Float, bindparam, cast, update
 from app.models.post import Post
+from app.models.user import User
 from app.schemas.post import PostCreate
+from app.core.config import settings
+from app.db.dialect import greatest, hours_since
+from app.core.counters import COUNTER_FIELDS
+from app.crud.search import index_post, unindex_post
+from app.crud.tag import normalize_tags, set_post_tags, tagged_post_ids
+from app.models.tag import post_tags
+from app.crud.resource_version import bump_versions, feed_scopes, post_scopes
 
 def create_post(db: Session, post: PostCreate, author_id: int = None):
     db_post = Post(
@@ -13,18 +24,219 @@ def create_post(db: Session, post: PostCreate, author_id: int = None):
         author_id=author_id,
         media_url=post.media_url,
         media_public_id=post.media_public_id,
-        media_type=post.media_type
+        media_type=post.media_type,
+        excerpt=make_excerpt(post.content)
     )
     db.add(db_post)
+    db.flush()
+    set_post_tags(db, db_post.id, post.tags)
+    index_post(db, db_post.id)
+    bump_versions(db, *feed_scopes(db_post.department))
     db.commit()
     db.refresh(db_post)
     return db_post
 
 from sqlalchemy.orm import joinedload
+from sqlalchemy import func, literal, tuple_
 
 def get_posts(db: Session, skip: int = 0, limit: int = 100):
     return db.query(Post).options(joinedload(Post.author)).order_by(Post.created_at.desc()).offset(skip).limit(limit).all()
 
+# --- Feed projection ---
+# List endpoints select only these columns as plain rows and build the
+# response dicts directly, skipping ORM identity-map work and per-row
+# Pydantic validation. Keys mirror schemas.post.Post / schemas.user.UserBasic.
+
+FEED_POST_FIELDS = (
+    "id", "title", "content", "created_at", "is_anonymous",
+    "upvotes", "downvotes", "comments_count", "share_count",
+    "author_id", "department", "tags", "type", "is_pinned", "pinned_until",
+    "media_url", "media_public_id", "media_type",
+)
+FEED_AUTHOR_FIELDS = ("id", "email", "username", "full_name", "profile_photo_url", "role", "enrollment_number")
+
+# Everything a client may ask for with `fields=`; "author" and "user_vote" are not post columns
+FEED_SELECTABLE_FIELDS = FEED_POST_FIELDS + ("excerpt", "author", "user_vote")
+# Always returned: identity, the cursor key and what anonymous redaction needs
+FEED_REQUIRED_FIELDS = ("id", "created_at", "is_anonymous")
+FEED_DEFAULT_FIELDS = FEED_POST_FIELDS + ("excerpt", "author", "user_vote")
+
+EXCERPT_LENGTH = 280
+
+def make_excerpt(content: str, length: int = EXCERPT_LENGTH) -> str:
+    """Feed preview: whitespace collapsed, cut on a word boundary."""
+    text = " ".join((content or "").split())
+    if len(text) <= length:
+        return text
+    cut = text[:length - 1].rsplit(" ", 1)[0] or text[:length - 1]
+    return cut + "…"
+
+def feed_fields(view: str = "full", fields: list = None) -> tuple:
+    """
+    Output fields for a feed page: everything (`full`), the `summary` view
+    (excerpt instead of the full content) or an explicit `fields=` list.
+    """
+    if fields:
+        return tuple(f for f in FEED_SELECTABLE_FIELDS if f in fields or f in FEED_REQUIRED_FIELDS)
+    if view == "summary":
+        return tuple(f for f in FEED_DEFAULT_FIELDS if f != "content")
+    return FEED_DEFAULT_FIELDS
+
+@lru_cache(maxsize=64)
+def _post_fields(fields: tuple) -> tuple:
+    return tuple(f for f in fields if f not in ("author", "user_vote"))
+
+def _feed_column(field: str):
+    if field == "excerpt":
+        # Rows written before the excerpt column existed fall back to a prefix
+        return func.coalesce(Post.excerpt, func.substr(Post.content, 1, EXCERPT_LENGTH)).label("excerpt")
+    return getattr(Post, field)
+
+def feed_query(db: Session, *extra_columns, fields: tuple = FEED_DEFAULT_FIELDS):
+    """
+    Projected post (+ author) columns for `fields`; columns that were not
+    asked for are never read. `extra_columns` are appended after them.
+    """
+    columns = [_feed_column(f) for f in _post_fields(fields)]
+    if "author" in fields:
+        columns += [getattr(User, f).label(f"author_{f}") for f in FEED_AUTHOR_FIELDS]
+    query = db.query(*columns, *extra_columns)
+    if "author" in fields:
+        query = query.outerjoin(User, Post.author_id == User.id)
+    return query
+
+def feed_row_to_dict(row, fields: tuple = FEED_DEFAULT_FIELDS, reveal_anonymous: bool = False) -> dict:
+    """Build the Post response dict from a feed_query row, redacting anonymous authors."""
+    post_fields = _post_fields(fields)
+    n = len(post_fields)
+    item = dict(zip(post_fields, row[:n]))
+    for counter in ("upvotes", "downvotes", "comments_count", "share_count"):
+        if counter in item:
+            item[counter] = item[counter] or 0
+    item["is_anonymous"] = bool(item["is_anonymous"])
+    if "is_pinned" in item:
+        item["is_pinned"] = bool(item["is_pinned"])
+    if "user_vote" in fields:
+        item["user_vote"] = None
+
+    redact = item["is_anonymous"] and not reveal_anonymous
+    if redact and "author_id" in item:
+        item["author_id"] = None
+    if "author" in fields:
+        author = row[n:n + len(FEED_AUTHOR_FIELDS)]
+        if redact or author[0] is None:
+            item["author"] = None
+        else:
+            item["author"] = dict(zip(FEED_AUTHOR_FIELDS, author))
+            item["author"]["role"] = item["author"]["role"] or "student"
+    return item
+
+def is_effectively_pinned():
+    """
+    Pinned and not yet expired. The pin sweeper clears expired pins, the
+    expiry check only covers the gap between two sweeps.
+    Uses func.now() to avoid python/db timezone mismatches.
+    """
+    return (Post.is_pinned == True) & \
+        ((Post.pinned_until == None) | (Post.pinned_until > func.now()))
+
+def _filter_feed(db: Session, query, department: str = None, tags: str = None, match_all_tags: bool = False):
+    """Department and tag filters shared by both feed queries; None if nothing can match."""
+    if department and department != 'ALL':
+        query = query.filter(Post.department == department)
+
+    tag_names = normalize_tags(tags)
+    if tag_names:
+        post_ids = tagged_post_ids(db, tag_names, match_all=match_all_tags)
+        if post_ids is None:
+            return None
+        query = query.filter(Post.id.in_(post_ids))
+    return query
+
+def get_pinned(
+    db: Session,
+    department: str = None,
+    tags: str = None,
+    match_all_tags: bool = False,
+    fields: tuple = FEED_DEFAULT_FIELDS,
+):
+    """
+    The (tiny) set of pinned posts for a feed, newest first, served by the
+    partial pinned index. Rows carry `pin_bucket` = 1.
+    """
+    query = feed_query(db, literal(1).label("pin_bucket"), fields=fields)\
+        .filter(is_effectively_pinned())
+    query = _filter_feed(db, query, department, tags, match_all_tags)
+    if query is None:
+        return []
+    return query.order_by(Post.created_at.desc(), Post.id.desc()).all()
+
+def get_feed(
+    db: Session,
+    limit: int = 100,
+    department: str = None,
+    tags: str = None,
+    after: tuple = None,
+    skip: int = 0,
+    match_all_tags: bool = False,
+    fields: tuple = FEED_DEFAULT_FIELDS,
+    pinned: list = None,
+):
+    """
+    Main feed: pinned posts first, then newest first.
+
+    Built from two index-backed queries instead of sorting on a pin CASE:
+    the pinned set (`pinned`, usually cached by the caller; loaded here if
+    omitted) and a newest-first keyset scan over (created_at, id) of
+    everything else - page 50 costs the same as page 1.
+
+    `after` is the (pin_bucket, created_at, id) key of the last row the client
+    saw. `tags` is a comma-separated list matched exactly (case-insensitive)
+    through post_tags; any tag matches unless `match_all_tags`.
+
+    Returns feed_query rows with a trailing `pin_bucket` column.
+    """
+    rows = []
+    if after is None or after[0]:
+        if pinned is None:
+            pinned = get_pinned(db, department, tags, match_all_tags, fields)
+        if after is not None:
+            # Resume inside the pinned set
+            pinned = [r for r in pinned if (r.created_at, r.id) < (after[1], after[2])]
+        rows = pinned[skip:skip + limit]
+        # Offsets past the pinned set carry over to the regular scan
+        skip = max(skip - len(pinned), 0)
+        if len(rows) == limit:
+            return rows
+
+    query = feed_query(db, literal(0).label("pin_bucket"), fields=fields)\
+        .filter(~is_effectively_pinned() | (Post.is_pinned == None))
+    query = _filter_feed(db, query, department, tags, match_all_tags)
+    if query is None:
+        return rows
+
+    if after is not None and not after[0]:
+        query = query.filter(tuple_(Post.created_at, Post.id) < tuple_(after[1], after[2]))
+
+    return rows + query.order_by(Post.created_at.desc(), Post.id.desc())\
+        .offset(skip).limit(limit - len(rows)).all()
+
+def expire_pins(db: Session, now: datetime = None) -> list:
+    """
+    Pin sweeper: unpin every post whose pin has expired as of `now`.
+    Returns the departments touched so their cached feeds can be invalidated.
+    """
+    now = now or datetime.utcnow()
+    expired = Post.is_pinned == True, Post.pinned_until != None, Post.pinned_until <= now
+    swept = db.query(Post.id, Post.department).filter(*expired).all()
+    if swept:
+        db.query(Post).filter(*expired).update(
+            {"is_pinned": False, "pinned_until": None}, synchronize_session=False
+        )
+        bump_versions(db, *[scope for post_id, department in swept for scope in post_scopes(post_id, department)])
+        db.commit()
+    return sorted({department for _, department in swept})
+
 def get_post(db: Session, post_id: int):
     return db.query(Post).filter(Post.id == post_id).first()
 
@@ -33,6 +245,126 @@ def delete_post(db: Session, post_id: int):
     # For now, simplistic delete.
     db_post = db.query(Post).filter(Post.id == post_id).first()
     if db_post:
+        unindex_post(db, post_id)
+        db.execute(post_tags.delete().where(post_tags.c.post_id == post_id))
         db.delete(db_post)
+        bump_versions(db, *post_scopes(post_id, db_post.department))
         db.commit()
     return db_post
+
+# --- Trending (hot score) ---
+
+# Oldest post any windowed /posts/popular timeframe can return ("month")
+HOT_SCORE_WINDOW = timedelta(days=30)
+
+def compute_hot_score(upvotes, downvotes, comments_count, share_count, created_at, now: datetime = None) -> float:
+    """
+    Popularity = (Net Votes) + (Comments * 2) + (Shares * 3), decayed by age:
+    score = popularity / (age_hours + 2) ^ gravity
+    """
+    now = now or datetime.utcnow()
+    popularity = ((upvotes or 0) - (downvotes or 0)) + (comments_count or 0) * 2 + (share_count or 0) * 3
+    age_hours = max((now - (created_at or now)).total_seconds() / 3600, 0)
+    return popularity / pow(age_hours + 2, settings.HOT_SCORE_GRAVITY)
+
+def counter_sql(bind, column, delta):
+    """`column + delta` for a post counter, floored at 0 like the counts it tracks."""
+    return greatest(bind, func.coalesce(column, 0) + delta, 0)
+
+def hot_score_sql(bind, now: datetime = None, **deltas):
+    """
+    compute_hot_score as a SQL expression over the row's counters plus
+    `deltas` (ints or bind parameters), for the SET clause of the UPDATE
+    applying those deltas: counters and hot score change in one statement.
+    """
+    now = now or datetime.utcnow()
+    posts = Post.__table__
+
+    def counter(field):
+        return counter_sql(bind, posts.c[field], deltas.get(field, 0))
+
+    popularity = counter("upvotes") - counter("downvotes") + counter("comments_count") * 2 + counter("share_count") * 3
+    age_hours = hours_since(bind, func.coalesce(posts.c.created_at, now), now)
+    return cast(popularity, Float) / func.power(age_hours + 2, settings.HOT_SCORE_GRAVITY)
+
+def refresh_hot_score(post: Post, now: datetime = None) -> None:
+    """Call after changing any counter on `post`, before the commit."""
+    post.hot_score = compute_hot_score(
+        post.upvotes, post.downvotes, post.comments_count, post.share_count, post.created_at, now
+    )
+
+# Counter row handed back by increment_post_counters for scopes, notifications and responses
+POST_COUNTER_COLUMNS = (
+    Post.id, Post.upvotes, Post.downvotes, Post.comments_count, Post.share_count,
+    Post.created_at, Post.author_id, Post.department,
+)
+
+def increment_post_counters(db: Session, post_id: int, **deltas: int):
+    """
+    `field = greatest(field + :delta, 0)` and the matching hot score on one
+    post, in one UPDATE in the caller's transaction, RETURNING
+    POST_COUNTER_COLUMNS. Returns None if the post does not exist.
+    """
+    return db.execute(
+        update(Post).where(Post.id == post_id).values({
+            **{field: counter_sql(db.get_bind(), getattr(Post, field), delta) for field, delta in deltas.items()},
+            "hot_score": hot_score_sql(db.get_bind(), **deltas),
+        }).returning(*POST_COUNTER_COLUMNS).execution_options(synchronize_session=False)
+    ).first()
+
+def recompute_hot_scores(db: Session, now: datetime = None, batch_size: int = 500) -> int:
+    """
+    Periodic job: re-apply the time decay to every post still inside the
+    trending window. Walks the window in id order in bounded batches.
+    Returns the number of posts updated.
+    """
+    now = now or datetime.utcnow()
+    updated = 0
+    last_id = 0
+    while True:
+        rows = db.query(
+            Post.id, Post.upvotes, Post.downvotes, Post.comments_count, Post.share_count, Post.created_at
+        ).filter(
+            Post.created_at >= now - HOT_SCORE_WINDOW,
+            Post.id > last_id
+        ).order_by(Post.id).limit(batch_size).all()
+        if not rows:
+            break
+
+        db.execute(update(Post), [
+            {"id": r.id, "hot_score": compute_hot_score(r.upvotes, r.downvotes, r.comments_count, r.share_count, r.created_at, now)}
+            for r in rows
+        ])
+        db.commit()
+        updated += len(rows)
+        last_id = rows[-1].id
+    return updated
+
+def apply_counter_deltas(db: Session, deltas: dict, now: datetime = None) -> list:
+    """
+    Apply {post_id: {"upvotes": d, "downvotes": d, ...}} counter deltas from
+    the write-behind buffer or the shard rollup: one executemany UPDATE of
+    in-SQL increments and hot scores, then a version bump for the touched
+    posts. Runs inside the caller's transaction; returns the departments
+    whose feeds changed.
+    """
+    if not deltas:
+        return []
+    posts = Post.__table__
+    increments = {field: bindparam(f"d_{field}") for field in COUNTER_FIELDS}
+    db.execute(
+        update(posts).where(posts.c.id == bindparam("post_id")).values({
+            **{field: counter_sql(db.get_bind(), posts.c[field], delta) for field, delta in increments.items()},
+            "hot_score": hot_score_sql(db.get_bind(), now, **increments),
+        }),
+        [
+            {"post_id": post_id, **{f"d_{field}": fields.get(field, 0) for field in COUNTER_FIELDS}}
+            for post_id, fields in sorted(deltas.items())  # fixed lock order between writers
+        ]
+    )
+
+    rows = db.query(Post.id, Post.department).filter(Post.id.in_(list(deltas))).all()
+    if not rows:
+        return []
+    bump_versions(db, *[scope for r in rows for scope in post_scopes(r.id, r.department)])
+    return sorted({r.department for r in rows})
@@ -0,0 +1,68 @@
+import random
+from typing import Dict, Iterable, List
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.counters import COUNTER_FIELDS
+from app.db.dialect import insert_for
+from app.models.post_counter import PostCounter
+from app.crud.post import apply_counter_deltas
+
+def increment_shard(db: Session, post_id: int, **deltas: int) -> None:
+    """Add deltas to a random shard of the post. Runs inside the caller's transaction."""
+    values = {field: deltas.get(field, 0) for field in COUNTER_FIELDS}
+    if not any(values.values()):
+        return
+    insert = insert_for(db.get_bind())
+    stmt = insert(PostCounter).values(post_id=post_id, shard=random.randrange(settings.COUNTER_SHARDS), **values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[PostCounter.post_id, PostCounter.shard],
+        set_={field: getattr(PostCounter, field) + stmt.excluded[field] for field in COUNTER_FIELDS},
+    )
+    db.execute(stmt)
+
+def get_shard_totals(db: Session, post_ids: Iterable[int]) -> Dict[int, Dict[str, int]]:
+    """{post_id: {field: not yet rolled up delta}} for a page of posts, in one query."""
+    post_ids = list(post_ids)
+    if not post_ids:
+        return {}
+    rows = db.query(
+        PostCounter.post_id, *[func.sum(getattr(PostCounter, field)).label(field) for field in COUNTER_FIELDS]
+    ).filter(PostCounter.post_id.in_(post_ids)).group_by(PostCounter.post_id).all()
+    return {row.post_id: {field: getattr(row, field) or 0 for field in COUNTER_FIELDS} for row in rows}
+
+def with_shard_totals(db: Session, items: List[dict]) -> List[dict]:
+    """Add pending shard deltas to the counters of feed dicts (only the fields they carry), floored at 0."""
+    if not items:
+        return items
+    totals = get_shard_totals(db, [item["id"] for item in items])
+    for item in items:
+        for field, delta in totals.get(item["id"], {}).items():
+            if field in item:
+                item[field] = max((item[field] or 0) + delta, 0)
+    return items
+
+def rollup_counter_shards(db: Session, batch_size: int = 500) -> List[str]:
+    """
+    Fold shards into the `posts` counters, batch_size posts per transaction.
+    DELETE ... RETURNING takes each shard's value and removes it atomically,
+    so an increment racing the rollup lands either in this fold or in a
+    fresh shard row for the next one. Returns the departments touched.
+    """
+    departments = set()
+    while True:
+        post_ids = select(PostCounter.post_id).distinct().limit(batch_size)
+        rows = db.execute(
+            delete(PostCounter).where(PostCounter.post_id.in_(post_ids))
+            .returning(PostCounter.post_id, *[getattr(PostCounter, field) for field in COUNTER_FIELDS])
+        ).all()
+        if not rows:
+            break
+        deltas: Dict[int, Dict[str, int]] = {}
+        for row in rows:
+            pending = deltas.setdefault(row.post_id, dict.fromkeys(COUNTER_FIELDS, 0))
+            for field in COUNTER_FIELDS:
+                pending[field] += getattr(row, field)
+        departments.update(apply_counter_deltas(db, deltas))
+        db.commit()
+    return sorted(departments)
@@ -1,61 +1,124 @@
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from app.models.reaction import Reaction
-
-def toggle_reaction(db: Session, user_id: int, emoji: str, target_type: str, target_id: int):
-    # Determine columns
-    post_id = target_id if target_type == 'post' else None
-    comment_id = target_id if target_type == 'comment' else None
-    
-    # Check if exists
-    query = db.query(Reaction).filter(
-        Reaction.user_id == user_id,
-        Reaction.emoji == emoji
-    )
-    if post_id:
-        query = query.filter(Reaction.post_id == post_id)
-    else:
-        query = query.filter(Reaction.comment_id == comment_id)
-        
-    existing = query.first()
-    
-    if existing:
-        db.delete(existing)
-        db.commit()
-        return None # Removed
-    
-    # Create
-    new_reaction = Reaction(
-        user_id=user_id,
-        emoji=emoji,
-        post_id=post_id,
-        comment_id=comment_id
+from sqlalchemy import DateTime, Integer, delete, exists, func, literal, select
+from app.db.dialect import insert_for
+from app.models.reaction import Reaction, EmojiCode
+from app.models.reaction_count import ReactionCount
+from app.models.comment import Comment
+from app.models.post import Post
+from app.crud.resource_version import bump_versions
+
+def touch_reaction_target(db: Session, comment_id: int = None):
+    # Comment reactions render in the post's comment list; post reactions aren't served yet
+    if comment_id:
+        post_id = db.query(Comment.post_id).filter(Comment.id == comment_id).scalar()
+        if post_id:
+            bump_versions(db, f"comments:{post_id}")
+
+def _target(target_type: str):
+    """(reactions column, target model) for a target type."""
+    if target_type == 'post':
+        return Reaction.post_id, Post
+    return Reaction.comment_id, Comment
+
+def add_reaction_count(db: Session, target_type: str, target_id: int, emoji: str, delta: int) -> int:
+    """`count = count + :delta` for one (target, emoji), creating the row. Returns the new count."""
+    insert = insert_for(db.get_bind())
+    stmt = insert(ReactionCount).values(target_type=target_type, target_id=target_id, emoji=emoji, count=delta)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ReactionCount.target_type, ReactionCount.target_id, ReactionCount.emoji],
+        set_={"count": ReactionCount.count + stmt.excluded["count"]},
     )
-    db.add(new_reaction)
+    return db.execute(stmt.returning(ReactionCount.count)).scalar_one()
+
+def toggle_reaction(db: Session, user_id: int, emoji: str, target_type: str, target_id: int) -> Optional[dict]:
+    """
+    Add the user's reaction, or remove it if it exists, keeping
+    reaction_counts in step, in one transaction:
+    INSERT ... SELECT (if the target exists) ON CONFLICT DO NOTHING, and
+    only if nothing was inserted, DELETE ... RETURNING.
+    Returns the emoji's new count and whether the user now reacts with it,
+    or None if the target does not exist.
+    """
+    column, model = _target(target_type)
+
+    insert = insert_for(db.get_bind())
+    added = db.execute(
+        insert(Reaction).from_select(
+            ["user_id", "emoji", column.key, "created_at"],
+            select(
+                literal(user_id, Integer), literal(emoji, EmojiCode), literal(target_id), literal(datetime.utcnow(), DateTime)
+            ).where(exists().where(model.id == target_id))
+        ).on_conflict_do_nothing().returning(Reaction.id)
+    ).first()
+
+    removed = None
+    if added is None:
+        removed = db.execute(
+            delete(Reaction).where(
+                Reaction.user_id == user_id,
+                Reaction.emoji == emoji,
+                column == target_id
+            ).returning(Reaction.id)
+        ).first()
+        if removed is None:
+            return None  # Target doesn't exist (or a concurrent toggle already removed it)
+
+    count = add_reaction_count(db, target_type, target_id, emoji, 1 if added else -1)
+    touch_reaction_target(db, target_id if target_type == 'comment' else None)
     db.commit()
-    return new_reaction
+    return {"emoji": emoji, "count": count, "user_reacted": added is not None}
 
 def get_reaction_counts(db: Session, target_type: str, target_id: int, user_id: int = None):
-    # Group by emoji
-    query = db.query(Reaction.emoji, func.count(Reaction.id))
-    if target_type == 'post':
-        query = query.filter(Reaction.post_id == target_id)
-    else:
-        query = query.filter(Reaction.comment_id == target_id)
-    
-    counts = query.group_by(Reaction.emoji).all()
-    
-    # Check user reactions
+    return get_reaction_counts_many(db, target_type, [target_id], user_id)[target_id]
+
+def get_reaction_counts_many(
+    db: Session, target_type: str, target_ids: Iterable[int], user_id: int = None
+) -> Dict[int, List[dict]]:
+    """
+    get_reaction_counts for a whole page/thread: {target_id: counts}, with one
+    reaction_counts primary-key lookup plus one query for the viewer's own
+    reactions.
+    """
+    target_ids = list(target_ids)
+    if not target_ids:
+        return {}
+    column, _ = _target(target_type)
+
+    counts = db.query(ReactionCount.target_id, ReactionCount.emoji, ReactionCount.count.label("total"))\
+        .filter(
+            ReactionCount.target_type == target_type,
+            ReactionCount.target_id.in_(target_ids),
+            ReactionCount.count > 0
+        ).order_by(ReactionCount.target_id, ReactionCount.emoji).all()
+
     user_reactions = set()
     if user_id:
-        u_query = db.query(Reaction.emoji).filter(Reaction.user_id == user_id)
-        if target_type == 'post':
-            u_query = u_query.filter(Reaction.post_id == target_id)
-        else:
-            u_query = u_query.filter(Reaction.comment_id == target_id)
-        user_reactions = {r[0] for r in u_query.all()}
-
-    return [
-        {"emoji": emoji, "count": count, "user_reacted": emoji in user_reactions}
-        for emoji, count in counts
-    ]
+        user_reactions = set(db.query(column, Reaction.emoji).filter(
+            Reaction.user_id == user_id,
+            column.in_(target_ids)
+        ).all())
+
+    result: Dict[int, List[dict]] = {target_id: [] for target_id in target_ids}
+    for target_id, emoji, count in counts:
+        result[target_id].append(
+            {"emoji": emoji, "count": count, "user_reacted": (target_id, emoji) in user_reactions}
+        )
+    return result
+
+def rebuild_reaction_counts(db: Session) -> int:
+    """Recompute reaction_counts from the reactions table (backfill/repair). Caller commits."""
+    db.execute(delete(ReactionCount))
+    total = 0
+    for target_type in ('post', 'comment'):
+        column, _ = _target(target_type)
+        rows = db.query(column, Reaction.emoji, func.count(Reaction.id))\
+            .filter(column.isnot(None)).group_by(column, Reaction.emoji).all()
+        if rows:
+            db.execute(ReactionCount.__table__.insert(), [
+                {"target_type": target_type, "target_id": target_id, "emoji": emoji, "count": count}
+                for target_id, emoji, count in rows
+            ])
+        total += len(rows)
+    return total
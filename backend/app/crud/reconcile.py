@@ -0,0 +1,155 @@
+"""
+Incremental reconciliation of the cached counters on posts and comments
+(upvotes, downvotes, comments_count) against the rows they summarize
+(votes, comments).
+
+Each run walks a bounded number of id-ordered chunks from a persisted
+high-water mark (job_checkpoints) and wraps around at the end of the table,
+so it can run continuously without full-table scans. Per chunk, stored
+counters and true aggregates are read in one statement (one snapshot), and
+only drifted rows are corrected, by the observed difference
+(`upvotes = upvotes + :fix`), so writes that commit meanwhile are kept.
+"""
+from typing import Dict, List, Tuple
+
+from sqlalchemy import bindparam, func, select, update
+from sqlalchemy.orm import Session
+
+from app.models.comment import Comment
+from app.models.job_checkpoint import JobCheckpoint
+from app.models.post import Post
+from app.models.vote import Vote
+from app.crud.post import compute_hot_score
+from app.models.post_counter import PostCounter
+from app.crud.resource_version import bump_versions, post_scopes
+
+
+def _count(*criteria):
+    return select(func.count()).where(*criteria).scalar_subquery()
+
+
+# {field: true aggregate} per table, correlated to the outer row
+TRUE_COUNTS = {
+    Post: {
+        "upvotes": _count(Vote.post_id == Post.id, Vote.vote_type == 1),
+        "downvotes": _count(Vote.post_id == Post.id, Vote.vote_type == -1),
+        "comments_count": _count(Comment.post_id == Post.id),
+    },
+    Comment: {
+        "upvotes": _count(Vote.comment_id == Comment.id, Vote.vote_type == 1),
+        "downvotes": _count(Vote.comment_id == Comment.id, Vote.vote_type == -1),
+    },
+}
+
+
+def get_checkpoint(db: Session, name: str) -> int:
+    checkpoint = db.get(JobCheckpoint, name)
+    return checkpoint.position if checkpoint else 0
+
+
+def set_checkpoint(db: Session, name: str, position: int) -> None:
+    checkpoint = db.get(JobCheckpoint, name)
+    if checkpoint is None:
+        db.add(JobCheckpoint(name=name, position=position))
+    else:
+        checkpoint.position = position
+
+
+def reconcile_chunk(
+    db: Session, model, after_id: int, limit: int, fields: Tuple[str, ...], pending_shards: bool = False
+) -> Tuple[int, int, List[dict]]:
+    """
+    Check `limit` rows of `model` with id > after_id. Returns (last id seen,
+    rows scanned, corrections) where each correction is {"id", field: fix}.
+    With `pending_shards` the not yet rolled up post_counters deltas count as
+    already stored.
+    """
+    columns = [getattr(model, field) for field in fields]
+    true_counts = [TRUE_COUNTS[model][field].label(f"true_{field}") for field in fields]
+    if pending_shards:
+        # Same statement as the counters, so a concurrent rollup can't skew them
+        columns += [
+            select(func.coalesce(func.sum(getattr(PostCounter, field)), 0))
+            .where(PostCounter.post_id == Post.id).scalar_subquery().label(f"shard_{field}")
+            for field in fields
+        ]
+    rows = db.execute(
+        select(model.id, *columns, *true_counts)
+        .where(model.id > after_id).order_by(model.id).limit(limit)
+    ).all()
+    if not rows:
+        return after_id, 0, []
+
+    corrections = []
+    for row in rows:
+        fixes = {
+            field: getattr(row, f"true_{field}") - (getattr(row, field) or 0)
+            - (getattr(row, f"shard_{field}") if pending_shards else 0)
+            for field in fields
+        }
+        if any(fixes.values()):
+            corrections.append({"id": row.id, **fixes})
+    return rows[-1].id, len(rows), corrections
+
+
+def apply_corrections(db: Session, model, fields: Tuple[str, ...], corrections: List[dict]) -> List[str]:
+    """Correct drifted rows and bump their versions. Returns the departments of fixed posts."""
+    table = model.__table__
+    db.execute(
+        update(table).where(table.c.id == bindparam("row_id")).values({
+            field: func.coalesce(table.c[field], 0) + bindparam(f"fix_{field}") for field in fields
+        }),
+        [
+            {"row_id": c["id"], **{f"fix_{field}": c[field] for field in fields}}
+            for c in corrections
+        ]
+    )
+    if model is not Post:
+        bump_versions(db, *{f"comments:{post_id}" for post_id in db.execute(
+            select(Comment.post_id).where(Comment.id.in_([c["id"] for c in corrections]))
+        ).scalars()})
+        return []
+
+    rows = db.query(
+        Post.id, Post.upvotes, Post.downvotes, Post.comments_count, Post.share_count, Post.created_at, Post.department
+    ).filter(Post.id.in_([c["id"] for c in corrections])).all()
+    db.execute(update(Post), [
+        {"id": r.id, "hot_score": compute_hot_score(r.upvotes, r.downvotes, r.comments_count, r.share_count, r.created_at)}
+        for r in rows
+    ])
+    bump_versions(db, *[scope for r in rows for scope in post_scopes(r.id, r.department)])
+    return sorted({r.department for r in rows})
+
+
+def reconcile_counters(
+    db: Session, model, fields: Tuple[str, ...], chunk_size: int = 500, max_chunks: int = 10,
+    pending_shards: bool = False
+) -> Dict[str, object]:
+    """
+    One bounded pass over `model`, resuming from its checkpoint. Each chunk
+    commits its corrections together with the new checkpoint. Returns drift
+    stats: rows scanned and fixed, total absolute drift per field, whether
+    the pass wrapped around, and the departments of fixed posts.
+    """
+    name = f"reconcile:{model.__tablename__}"
+    stats = {"scanned": 0, "fixed": 0, "drift": dict.fromkeys(fields, 0), "wrapped": False, "departments": []}
+    position = get_checkpoint(db, name)
+    for _ in range(max_chunks):
+        last_id, scanned, corrections = reconcile_chunk(db, model, position, chunk_size, fields, pending_shards)
+        if corrections:
+            departments = apply_corrections(db, model, fields, corrections)
+            stats["departments"] = sorted(set(stats["departments"]) | set(departments))
+        stats["scanned"] += scanned
+        stats["fixed"] += len(corrections)
+        for c in corrections:
+            for field in fields:
+                stats["drift"][field] += abs(c[field])
+
+        # End of table: start over from the beginning next time
+        position = 0 if scanned < chunk_size else last_id
+        set_checkpoint(db, name, position)
+        db.commit()
+        if position == 0:
+            stats["wrapped"] = True
+            break
+    return stats
@@ -0,0 +1,68 @@
+from typing import Dict, Iterable, List
+from sqlalchemy import or_, select
+from sqlalchemy.orm import Session
+from app.db.dialect import insert_for
+from app.models.resource_version import ResourceVersion
+from app.models.post import Post
+from app.models.notification import Notification
+from app.models.announcement import Announcement
+
+def feed_scopes(department: str = None) -> List[str]:
+    """
+    The department feed only. There is no "feed:*" row to bump: the
+    all-departments feed is versioned by all department feeds together
+    (see get_versions), so writes never queue on one shared row.
+    """
+    return [f"feed:{department}"] if department else []
+
+def post_scopes(post_id: int, department: str = None) -> List[str]:
+    """Everything that renders a post: the post itself and the feeds listing it."""
+    return [f"post:{post_id}"] + feed_scopes(department)
+
+def bump_versions(db: Session, *scopes: str) -> None:
+    """
+    Increment change counters inside the caller's transaction. Call it right
+    before the commit so the counter row locks are held as briefly as possible.
+    """
+    scopes = sorted(set(scopes))  # fixed order avoids deadlocks between writers
+    if not scopes:
+        return
+    insert = insert_for(db.get_bind())
+    stmt = insert(ResourceVersion).values([{"scope": s, "version": 1} for s in scopes])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ResourceVersion.scope],
+        set_={"version": ResourceVersion.version + 1},
+    )
+    db.execute(stmt)
+
+def user_scopes(db: Session, user_id: int) -> List[str]:
+    """
+    Everything that embeds a user's name or photo: their posts and the feeds
+    listing them, notifications they sent and announcements.
+    """
+    posts = db.execute(select(Post.id, Post.department).where(Post.author_id == user_id)).all()
+    recipients = db.execute(
+        select(Notification.recipient_id).where(Notification.sender_id == user_id).distinct()
+    ).scalars()
+    scopes = [f"post:{post_id}" for post_id, _ in posts]
+    scopes += [f"feed:{department}" for department in {department for _, department in posts}]
+    scopes += [f"notifications:{recipient_id}" for recipient_id in recipients]
+    if db.execute(select(Announcement.id).where(Announcement.sender_id == user_id).limit(1)).first():
+        scopes.append("announcements")
+    return scopes
+
+def get_versions(db: Session, scopes: Iterable[str]) -> Dict[str, int]:
+    """
+    Current counters for `scopes`. A wildcard scope such as "feed:*" stands
+    for every scope under its prefix and is expanded to their counters.
+    """
+    scopes = list(scopes)
+    exact = [s for s in scopes if not s.endswith(":*")]
+    criteria = [ResourceVersion.scope.like(s[:-1] + "%") for s in scopes if s.endswith(":*")]
+    if exact:
+        criteria.append(ResourceVersion.scope.in_(exact))
+    rows = db.query(ResourceVersion.scope, ResourceVersion.version)\
+        .filter(or_(*criteria)).all()
+    versions = {scope: 0 for scope in exact}
+    versions.update({scope: version for scope, version in rows})
+    return versions
@@ -0,0 +1,158 @@
+"""
+Notification retention, run by the notification_retention job.
+
+- Read notifications older than the cutoff are deleted in bounded,
+  separately committed batches (unread ones are kept, so unread counters
+  stay exact). Announcements past the cutoff that everyone they were for
+  has read go with their read marks.
+- When `notifications` is range-partitioned by month on PostgreSQL
+  (scripts/partition_notifications.py), upcoming months get their
+  partition ahead of time and months entirely past the cutoff are dropped
+  whole once they hold no unread rows: O(1) instead of a row-by-row delete.
+"""
+import re
+from datetime import datetime
+from typing import Dict, List, Set, Tuple
+
+from sqlalchemy import delete, exists, or_, select, text
+from sqlalchemy.orm import Session
+
+from app.models.announcement import Announcement, AnnouncementRead
+from app.models.notification import Notification, NotificationActor
+from app.models.user import User
+from app.crud.resource_version import bump_versions
+
+PARTITION_NAME = re.compile(r"^notifications_y(\d{4})m(\d{2})$")
+
+
+def prune_read_notifications(
+    db: Session, cutoff: datetime, batch_size: int = 1000, max_batches: int = 20
+) -> Tuple[int, Set[int]]:
+    """
+    Delete read notifications created before `cutoff`, oldest first, up to
+    batch_size * max_batches rows, committing each batch. Returns (rows
+    deleted, recipients whose lists changed).
+    """
+    expired = (Notification.is_read == True, Notification.created_at < cutoff)  # noqa: E712 - matches the partial index
+    deleted, recipients = 0, set()
+    for _ in range(max_batches):
+        batch = select(Notification.id).where(*expired).order_by(Notification.created_at).limit(batch_size)
+        # Re-checked on delete: a coalesced row may have become unread meanwhile
+        rows = db.execute(
+            delete(Notification).where(Notification.id.in_(batch), *expired)
+            .returning(Notification.id, Notification.recipient_id).execution_options(synchronize_session=False)
+        ).all()
+        if rows:
+            # Actors of coalesced rows (not a foreign key, see NotificationActor)
+            db.execute(delete(NotificationActor).where(NotificationActor.notification_id.in_([r.id for r in rows])))
+        batch_recipients = {r.recipient_id for r in rows if r.recipient_id is not None}
+        bump_versions(db, *[f"notifications:{r}" for r in batch_recipients])
+        db.commit()
+        deleted += len(rows)
+        recipients |= batch_recipients
+        if len(rows) < batch_size:
+            break
+    return deleted, recipients
+
+
+def prune_announcements(db: Session, cutoff: datetime, batch_size: int = 1000) -> int:
+    """
+    Delete announcements made before `cutoff` that every user they were
+    shown to has read (see visible_announcements), with their read marks.
+    An announcement still unread by anyone is kept. Commits.
+    """
+    unread_by_someone = exists().where(
+        User.created_at <= Announcement.created_at,
+        or_(Announcement.sender_id.is_(None), User.id != Announcement.sender_id),
+        ~exists().where(
+            AnnouncementRead.user_id == User.id, AnnouncementRead.announcement_id == Announcement.id
+        ).correlate_except(AnnouncementRead),
+    )
+    ids = db.execute(
+        select(Announcement.id).where(Announcement.created_at < cutoff, ~unread_by_someone)
+        .order_by(Announcement.id).limit(batch_size)
+    ).scalars().all()
+    if not ids:
+        return 0
+    db.execute(delete(AnnouncementRead).where(AnnouncementRead.announcement_id.in_(ids)))
+    db.execute(delete(Announcement).where(Announcement.id.in_(ids)))
+    bump_versions(db, "announcements")
+    db.commit()
+    return len(ids)
+
+
+def notifications_partitioned(db: Session) -> bool:
+    if db.get_bind().dialect.name != "postgresql":
+        return False
+    return db.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table p "
+        "JOIN pg_class c ON c.oid = p.partrelid WHERE c.relname = 'notifications')"
+    )).scalar()
+
+
+def month_start(value: datetime, months: int = 0) -> datetime:
+    """First instant of the month `months` after the one containing `value`."""
+    index = value.year * 12 + value.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: datetime) -> str:
+    return f"notifications_y{month:%Y}m{month:%m}"
+
+
+def create_notification_partition(db: Session, month: datetime) -> bool:
+    """Create the partition for `month` if missing. Caller commits."""
+    name = partition_name(month)
+    if db.execute(text("SELECT to_regclass(:name) IS NOT NULL"), {"name": name}).scalar():
+        return False
+    db.execute(text(
+        f"CREATE TABLE {name} PARTITION OF notifications "
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{month_start(month, 1).isoformat()}')"
+    ))
+    return True
+
+
+def list_notification_partitions(db: Session) -> List[str]:
+    return db.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = 'notifications' ORDER BY c.relname"
+    )).scalars().all()
+
+
+def maintain_notification_partitions(db: Session, now: datetime, cutoff: datetime, months_ahead: int = 2) -> Dict[str, list]:
+    """
+    Create partitions for this month and the next `months_ahead`, and drop
+    monthly partitions that end before `cutoff` (None keeps them all) and
+    hold no unread notifications. A partition with unread rows is kept; its
+    read rows are pruned row by row like any others.
+    """
+    created = []
+    for months in range(months_ahead + 1):
+        month = month_start(now, months)
+        if create_notification_partition(db, month):
+            created.append(partition_name(month))
+    db.commit()
+
+    dropped, kept = [], []
+    for name in list_notification_partitions(db):
+        match = PARTITION_NAME.match(name)
+        if cutoff is None or not match:
+            continue  # e.g. the default partition
+        month = datetime(int(match.group(1)), int(match.group(2)), 1)
+        if month_start(month, 1) > cutoff:
+            continue
+        # No row can become unread (coalescing is off on partitioned tables)
+        # or be inserted for a past month until the drop commits
+        db.execute(text(f"LOCK TABLE {name} IN ACCESS EXCLUSIVE MODE"))
+        if db.execute(text(f"SELECT EXISTS (SELECT 1 FROM {name} WHERE is_read IS NOT true)")).scalar():
+            db.rollback()
+            kept.append(name)
+            continue
+        recipients = db.execute(text(f"SELECT DISTINCT recipient_id FROM {name} WHERE recipient_id IS NOT NULL")).scalars().all()
+        db.execute(text(f"DROP TABLE {name}"))
+        bump_versions(db, *[f"notifications:{r}" for r in recipients])
+        db.commit()
+        dropped.append(name)
+    return {"created": created, "dropped": dropped, "kept": kept}
@@ -0,0 +1,147 @@
+"""
+Full-text search over posts.
+
+PostgreSQL: weighted `posts.search_vector` tsvector column (title > tags >
+content) with a GIN index, ranked by ts_rank_cd.
+SQLite (local dev): an FTS5 table `posts_fts` keyed by post id, ranked by bm25.
+
+The column / FTS table are not mapped on the Post model so the model stays
+portable across both databases; they are created by ensure_search_schema()
+at startup and kept current by index_post() / unindex_post() in the post
+write path.
+"""
+import re
+from typing import List, Optional, Tuple
+
+from sqlalchemy import Float, cast, column, func, literal_column, table, text, tuple_
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, joinedload
+
+from app.models.post import Post
+
+PG_SEARCH_VECTOR = """
+    setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce(tags, '')), 'B') ||
+    setweight(to_tsvector('english', coalesce(content, '')), 'C')
+"""
+
+posts_fts = table("posts_fts", column("rowid"))
+
+
+def _is_postgres(bind) -> bool:
+    return bind.dialect.name == "postgresql"
+
+
+def ensure_search_schema(engine: Engine) -> None:
+    """Idempotent DDL for the search index (safe to run on every startup)."""
+    with engine.begin() as conn:
+        if _is_postgres(engine):
+            conn.execute(text("ALTER TABLE posts ADD COLUMN IF NOT EXISTS search_vector tsvector"))
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_posts_search_vector ON posts USING GIN (search_vector)"
+            ))
+        else:
+            conn.execute(text(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts USING fts5(title, tags, content)"
+            ))
+
+
+def index_post(db: Session, post_id: int) -> None:
+    """(Re)index one post. Runs inside the caller's transaction."""
+    if _is_postgres(db.get_bind()):
+        db.execute(
+            text(f"UPDATE posts SET search_vector = {PG_SEARCH_VECTOR} WHERE id = :id"),
+            {"id": post_id},
+        )
+    else:
+        db.execute(text("DELETE FROM posts_fts WHERE rowid = :id"), {"id": post_id})
+        db.execute(
+            text(
+                "INSERT INTO posts_fts (rowid, title, tags, content) "
+                "SELECT id, title, coalesce(tags, ''), content FROM posts WHERE id = :id"
+            ),
+            {"id": post_id},
+        )
+
+
+def unindex_post(db: Session, post_id: int) -> None:
+    # The PostgreSQL vector lives on the row itself and goes away with it
+    if not _is_postgres(db.get_bind()):
+        db.execute(text("DELETE FROM posts_fts WHERE rowid = :id"), {"id": post_id})
+
+
+def backfill_search_index(db: Session, batch_size: int = 500) -> int:
+    """
+    Index every post that is not indexed yet, in bounded batches with a
+    commit per batch. Returns the number of posts indexed.
+    """
+    total = 0
+    while True:
+        if _is_postgres(db.get_bind()):
+            result = db.execute(
+                text(
+                    f"UPDATE posts SET search_vector = {PG_SEARCH_VECTOR} WHERE id IN ("
+                    "SELECT id FROM posts WHERE search_vector IS NULL ORDER BY id LIMIT :n)"
+                ),
+                {"n": batch_size},
+            )
+        else:
+            result = db.execute(
+                text(
+                    "INSERT INTO posts_fts (rowid, title, tags, content) "
+                    "SELECT id, title, coalesce(tags, ''), content FROM posts "
+                    "WHERE id NOT IN (SELECT rowid FROM posts_fts) ORDER BY id LIMIT :n"
+                ),
+                {"n": batch_size},
+            )
+        db.commit()
+        if not result.rowcount:
+            break
+        total += result.rowcount
+    return total
+
+
+def _fts5_match(q: str) -> Optional[str]:
+    # Quote every term so user input can never be parsed as FTS5 syntax
+    terms = re.findall(r"\w+", q)
+    return " ".join(f'"{t}"' for t in terms) or None
+
+
+def search_posts(
+    db: Session,
+    q: str,
+    limit: int = 20,
+    department: str = None,
+    after: Tuple[float, int] = None,
+) -> List[Tuple[Post, float]]:
+    """
+    Ranked search, best match first. `after` is the (rank, id) key of the
+    last row of the previous page. Returns (post, rank) rows.
+    """
+    if _is_postgres(db.get_bind()):
+        tsquery = func.websearch_to_tsquery("english", q)
+        vector = literal_column("posts.search_vector")
+        # float4 from ts_rank_cd; as float8 it survives the cursor round trip
+        # exactly, so the keyset comparison below matches the ORDER BY
+        rank = cast(func.ts_rank_cd(vector, tsquery), Float(53))
+        query = db.query(Post, rank.label("rank")).filter(vector.op("@@")(tsquery))
+    else:
+        match = _fts5_match(q)
+        if not match:
+            return []
+        # bm25 is lower-is-better; negate so both engines rank descending.
+        # Column weights mirror the tsvector A/B/C weights.
+        rank = -func.bm25(literal_column("posts_fts"), 10.0, 5.0, 1.0)
+        query = db.query(Post, rank.label("rank"))\
+            .join(posts_fts, posts_fts.c.rowid == Post.id)\
+            .filter(literal_column("posts_fts").op("MATCH")(match))
+
+    if department and department != 'ALL':
+        query = query.filter(Post.department == department)
+
+    if after is not None:
+        query = query.filter(tuple_(rank, Post.id) < tuple_(*after))
+
+    return query.options(joinedload(Post.author))\
+        .order_by(rank.desc(), Post.id.desc())\
+        .limit(limit).all()
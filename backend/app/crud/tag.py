@@ -0,0 +1,52 @@
+from typing import List, Optional
+from sqlalchemy import select, func
+from sqlalchemy.orm import Session
+from app.db.dialect import insert_for
+from app.models.tag import Tag, post_tags
+
+def normalize_tags(raw: Optional[str]) -> List[str]:
+    """'Event, exam,,event' -> ['event', 'exam'] (order kept, duplicates dropped)."""
+    names = []
+    for t in (raw or "").split(","):
+        t = t.strip().lower()
+        if t and t not in names:
+            names.append(t)
+    return names
+
+def get_or_create_tag_ids(db: Session, names: List[str]) -> List[int]:
+    """
+    Ids of the tags called `names`, in order. Missing ones are created with
+    INSERT ... ON CONFLICT (name) DO NOTHING and re-selected, so concurrent
+    posts introducing the same new tag don't collide. Runs in the caller's
+    transaction.
+    """
+    if not names:
+        return []
+    ids = dict(db.execute(select(Tag.name, Tag.id).where(Tag.name.in_(names))).all())
+    missing = [name for name in names if name not in ids]
+    if missing:
+        insert = insert_for(db.get_bind())
+        db.execute(insert(Tag).values([{"name": name} for name in missing]).on_conflict_do_nothing(index_elements=[Tag.name]))
+        ids.update(db.execute(select(Tag.name, Tag.id).where(Tag.name.in_(missing))).all())
+    return [ids[name] for name in names]
+
+def set_post_tags(db: Session, post_id: int, raw_tags: Optional[str]) -> None:
+    """Mirror a post's comma-separated tags into post_tags. Runs in the caller's transaction."""
+    db.execute(post_tags.delete().where(post_tags.c.post_id == post_id))
+    tag_ids = get_or_create_tag_ids(db, normalize_tags(raw_tags))
+    if tag_ids:
+        db.execute(post_tags.insert(), [{"post_id": post_id, "tag_id": tag_id} for tag_id in tag_ids])
+
+def tagged_post_ids(db: Session, names: List[str], match_all: bool = False):
+    """
+    Subquery of post ids carrying any (or all) of `names`, served by the
+    (tag_id, post_id) index. Returns None when nothing can match.
+    """
+    tag_ids = [tag_id for (tag_id,) in db.query(Tag.id).filter(Tag.name.in_(names))]
+    if not tag_ids or (match_all and len(tag_ids) < len(names)):
+        return None
+
+    query = select(post_tags.c.post_id).where(post_tags.c.tag_id.in_(tag_ids))
+    if match_all:
+        query = query.group_by(post_tags.c.post_id).having(func.count() == len(tag_ids))
+    return query
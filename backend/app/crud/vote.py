@@ -0,0 +1,183 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import bindparam, delete, func, literal, select, update
+from sqlalchemy.orm import Session
+from app.db.dialect import insert_for
+from app.models.vote import Vote
+from app.models.post import Post
+from app.models.comment import Comment
+from app.crud.post import hot_score_sql, apply_counter_deltas
+
+def get_user_post_votes(db: Session, user_id: int, post_ids: Iterable[int]) -> Dict[int, int]:
+    """{post_id: vote_type} for one viewer over a whole page, in a single query."""
+    post_ids = list(post_ids)
+    if not post_ids:
+        return {}
+    rows = db.query(Vote.post_id, Vote.vote_type).filter(
+        Vote.user_id == user_id,
+        Vote.post_id.in_(post_ids)
+    ).all()
+    return {post_id: vote_type for post_id, vote_type in rows}
+
+def get_user_comment_votes(db: Session, user_id: int, comment_ids: Iterable[int]) -> Dict[int, int]:
+    """{comment_id: vote_type} for one viewer over a whole thread, in a single query."""
+    comment_ids = list(comment_ids)
+    if not comment_ids:
+        return {}
+    rows = db.query(Vote.comment_id, Vote.vote_type).filter(
+        Vote.user_id == user_id,
+        Vote.comment_id.in_(comment_ids)
+    ).all()
+    return {comment_id: vote_type for comment_id, vote_type in rows}
+
+def change_vote_row(db: Session, user_id: int, vote_type: int, model, target_id: int) -> Tuple[str, Dict[str, int]]:
+    """Steps 1 and 2 of apply_vote. Returns (status, {"upvotes": delta, "downvotes": delta})."""
+    key = Vote.post_id if model is Post else Vote.comment_id
+    insert = insert_for(db.get_bind())
+    insert_vote = insert(Vote).from_select(
+        ["user_id", key.key, "vote_type"],
+        select(literal(user_id), literal(target_id), literal(vote_type)).where(model.id == target_id)
+    ).on_conflict_do_nothing(index_elements=[Vote.user_id, key]).returning(Vote.id)
+
+    # The common case, a first vote, takes this one statement
+    if db.execute(insert_vote).first() is not None:
+        return "added", {"upvotes": int(vote_type == 1), "downvotes": int(vote_type == -1)}
+
+    old_type = db.execute(
+        delete(Vote).where(Vote.user_id == user_id, key == target_id).returning(Vote.vote_type)
+    ).scalar()
+    new_type = None
+    status = "removed" if old_type is not None else "unchanged"
+    if old_type != vote_type and db.execute(insert_vote).first() is not None:
+        new_type = vote_type
+        status = "switched" if old_type is not None else "added"
+
+    return status, {
+        "upvotes": (new_type == 1) - (old_type == 1),
+        "downvotes": (new_type == -1) - (old_type == -1),
+    }
+
+# Columns handed back to cast_vote for scopes, notifications and the response
+TARGET_COLUMNS = {
+    Post: (Post.id, Post.upvotes, Post.downvotes, Post.comments_count, Post.share_count,
+           Post.created_at, Post.author_id, Post.department),
+    Comment: (Comment.id, Comment.upvotes, Comment.downvotes, Comment.post_id, Comment.author_id),
+}
+
+def apply_vote(
+    db: Session, user_id: int, vote_type: int, post_id: int = None, comment_id: int = None,
+    defer_post_counters: bool = False
+) -> Optional[dict]:
+    """
+    Toggle off, switch or add a vote without reading anything first:
+
+    1. INSERT the new vote, guarded by the target existing, ON CONFLICT
+       DO NOTHING. Inserted means a first vote: go to step 3.
+    2. Otherwise DELETE the user's existing vote, RETURNING its type. Same
+       type as the new vote means a toggle off; a different one is a switch,
+       so INSERT again. If that conflicts, a concurrent request from the
+       same user got there first and already counted its vote.
+    3. Apply the net change in SQL (`upvotes = upvotes + :delta`, and a
+       post's hot score from the new counters) in one UPDATE RETURNING the
+       new counters.
+
+    A first vote is therefore two statements (plus the caller's version bump).
+
+    With `defer_post_counters` (write-behind / sharded mode) a post's
+    counters are only read in step 3; the caller applies the returned deltas
+    to the buffer or a counter shard.
+
+    Runs inside the caller's transaction. Returns None if the target does not
+    exist, else {"status", "target", "deltas", "deferred"} where target is the
+    counter row (updated unless deferred).
+    """
+    model = Post if post_id else Comment
+    target_id = post_id or comment_id
+    status, deltas = change_vote_row(db, user_id, vote_type, model, target_id)
+    up_delta, down_delta = deltas["upvotes"], deltas["downvotes"]
+
+    deferred = defer_post_counters and model is Post
+    if deferred:
+        target = db.execute(select(*TARGET_COLUMNS[Post]).where(Post.id == target_id)).first()
+        return {"status": status, "target": target, "deltas": deltas, "deferred": True} if target else None
+
+    values = {
+        "upvotes": func.coalesce(model.upvotes, 0) + up_delta,
+        "downvotes": func.coalesce(model.downvotes, 0) + down_delta,
+    }
+    if model is Post and (up_delta or down_delta):
+        values["hot_score"] = hot_score_sql(db.get_bind(), **deltas)
+    target = db.execute(
+        update(model).where(model.id == target_id).values(values)
+        .returning(*TARGET_COLUMNS[model]).execution_options(synchronize_session=False)
+    ).first()
+    if target is None:
+        return None
+    return {"status": status, "target": target, "deltas": deltas, "deferred": False}
+
+def apply_votes(db: Session, user_id: int, items: List[dict], defer_post_counters: bool = False) -> dict:
+    """
+    Batch form of apply_vote, for clients replaying queued votes. `items` are
+    already validated {"post_id", "comment_id", "vote_type"} dicts.
+
+    Targets are checked with one IN query per target type, vote rows are
+    changed in item order (so a repeated target toggles like repeated calls
+    would), and the counter deltas are summed per target and applied with one
+    executemany UPDATE per type. Posts go through apply_counter_deltas (hot
+    score, version bump) unless `defer_post_counters`, in which case the
+    caller gets their deltas back in "post_deltas".
+
+    Runs inside the caller's transaction. Returns {"results": [{"status",
+    "post_id", "comment_id"}], "posts": {id: row}, "comments": {id: row},
+    "post_deltas", "departments"}; rows carry the counters after the batch.
+    """
+    post_ids = {item["post_id"] for item in items if item["post_id"]}
+    comment_ids = {item["comment_id"] for item in items if item["comment_id"]}
+    existing = {
+        Post: set(db.execute(select(Post.id).where(Post.id.in_(post_ids))).scalars()) if post_ids else set(),
+        Comment: set(db.execute(select(Comment.id).where(Comment.id.in_(comment_ids))).scalars()) if comment_ids else set(),
+    }
+
+    results = []
+    deltas = {Post: {}, Comment: {}}
+    for item in items:
+        model = Post if item["post_id"] else Comment
+        target_id = item["post_id"] or item["comment_id"]
+        result = {"post_id": item["post_id"], "comment_id": item["comment_id"]}
+        if target_id not in existing[model]:
+            results.append({**result, "status": "not_found"})
+            continue
+        status, change = change_vote_row(db, user_id, item["vote_type"], model, target_id)
+        results.append({**result, "status": status})
+        pending = deltas[model].setdefault(target_id, {"upvotes": 0, "downvotes": 0})
+        for field, delta in change.items():
+            pending[field] += delta
+
+    departments = []
+    post_deltas = {post_id: d for post_id, d in deltas[Post].items() if any(d.values())}
+    if post_deltas and not defer_post_counters:
+        departments = apply_counter_deltas(db, post_deltas)
+    comment_deltas = {comment_id: d for comment_id, d in deltas[Comment].items() if any(d.values())}
+    if comment_deltas:
+        comments = Comment.__table__
+        db.execute(
+            update(comments).where(comments.c.id == bindparam("comment_id")).values(
+                upvotes=func.coalesce(comments.c.upvotes, 0) + bindparam("d_upvotes"),
+                downvotes=func.coalesce(comments.c.downvotes, 0) + bindparam("d_downvotes"),
+            ),
+            [
+                {"comment_id": comment_id, "d_upvotes": d["upvotes"], "d_downvotes": d["downvotes"]}
+                for comment_id, d in sorted(comment_deltas.items())
+            ]
+        )
+
+    return {
+        "results": results,
+        "posts": {row.id: row for row in db.execute(
+            select(*TARGET_COLUMNS[Post]).where(Post.id.in_(existing[Post]))
+        )} if existing[Post] else {},
+        "comments": {row.id: row for row in db.execute(
+            select(*TARGET_COLUMNS[Comment]).where(Comment.id.in_(existing[Comment]))
+        )} if existing[Comment] else {},
+        "post_deltas": post_deltas if defer_post_counters else {},
+        "departments": departments,
+    }
@@ -0,0 +1,28 @@
+"""
+Dialect-specific SQL constructs (PostgreSQL in production, SQLite locally).
+"""
+from datetime import datetime
+
+from sqlalchemy import Float, cast, extract, func, literal
+from sqlalchemy.dialects import postgresql, sqlite
+
+
+def insert_for(bind):
+    """INSERT construct supporting on_conflict_do_update/do_nothing for this bind."""
+    if bind.dialect.name == "postgresql":
+        return postgresql.insert
+    return sqlite.insert
+
+
+def greatest(bind, *args):
+    """SQL greatest(); SQLite spells it as the multi-argument scalar max()."""
+    if bind.dialect.name == "postgresql":
+        return func.greatest(*args)
+    return func.max(*args)
+
+
+def hours_since(bind, column, now: datetime):
+    """Hours from a timestamp column to `now`, as a SQL float, never negative."""
+    if bind.dialect.name == "postgresql":
+        return greatest(bind, cast(extract("epoch", literal(now) - column), Float) / 3600, 0)
+    return greatest(bind, (func.julianday(literal(now)) - func.julianday(column)) * 24, 0)
@@ -6,10 +6,12 @@ This module provides:
 - Session factory for database transactions
 - Base class for ORM models
 - Database dependency for FastAPI routes
+- Async engine/session for `async def` routes (get_async_db)
 """
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base, Session
-from typing import Generator
+from typing import AsyncGenerator, Generator
 
 # Create Base for models (no engine binding here!)
 Base = declarative_base()
@@ -17,6 +19,22 @@ Base = declarative_base()
 # Global engine and session factory (will be initialized in startup event)
 engine = None
 SessionLocal = None
+async_engine = None
+AsyncSessionLocal = None
+
+
+def async_database_url(database_url: str) -> str:
+    """Same database, async driver (asyncpg for PostgreSQL, aiosqlite for SQLite)."""
+    if database_url.startswith("postgres://"):
+        database_url = database_url.replace("postgres://", "postgresql://", 1)
+    for sync_prefix, async_prefix in (
+        ("postgresql+psycopg2://", "postgresql+asyncpg://"),
+        ("postgresql://", "postgresql+asyncpg://"),
+        ("sqlite://", "sqlite+aiosqlite://"),
+    ):
+        if database_url.startswith(sync_prefix):
+            return async_prefix + database_url[len(sync_prefix):]
+    return database_url
 
 
 def init_db(database_url: str) -> None:
@@ -28,7 +46,7 @@ def init_db(database_url: str) -> None:
     Args:
         database_url: PostgreSQL connection string
     """
-    global engine, SessionLocal
+    global engine, SessionLocal, async_engine, AsyncSessionLocal
     
     # Create engine with connection pooling
     engine = create_engine(
@@ -45,6 +63,24 @@ def init_db(database_url: str) -> None:
         autoflush=False,
         bind=engine
     )
+    
+    # Async engine for hot `async def` write routes, so DB round trips
+    # don't block the event loop (and every open WebSocket with it).
+    # Smaller overflow: both pools share the database's connection limit.
+    async_url = async_database_url(database_url)
+    # aiosqlite (local dev) uses a NullPool, which takes no sizing arguments
+    pool_args = {} if async_url.startswith("sqlite") else {"pool_size": 5, "max_overflow": 5}
+    async_engine = create_async_engine(
+        async_url,
+        pool_pre_ping=True,
+        echo=False,
+        **pool_args,
+    )
+    AsyncSessionLocal = async_sessionmaker(
+        bind=async_engine,
+        autoflush=False,
+        expire_on_commit=False,
+    )
 
 
 def create_tables() -> None:
@@ -59,10 +95,21 @@ def create_tables() -> None:
     from app.models import post  # noqa: F401
     from app.models import comment  # noqa: F401
     from app.models import reaction  # noqa: F401
+    from app.models import reaction_count  # noqa: F401
     from app.models import audit_log # noqa: F401
+    from app.models import tag  # noqa: F401
+    from app.models import resource_version  # noqa: F401
+    from app.models import post_counter  # noqa: F401
+    from app.models import job_checkpoint  # noqa: F401
+    from app.models import notification  # noqa: F401
+    from app.models import announcement  # noqa: F401
     
     # Create all tables
     Base.metadata.create_all(bind=engine)
+    
+    # Full-text search index (tsvector column on PostgreSQL, FTS5 on SQLite)
+    from app.crud.search import ensure_search_schema
+    ensure_search_schema(engine)
 
 
 def close_db() -> None:
@@ -76,6 +123,16 @@ def close_db() -> None:
         engine.dispose()
 
 
+async def close_async_db() -> None:
+    """
+    Close async database connections.
+    
+    This should be called in FastAPI shutdown event.
+    """
+    if async_engine:
+        await async_engine.dispose()
+
+
 def get_db() -> Generator[Session, None, None]:
     """
     Database session dependency for FastAPI routes.
@@ -96,3 +153,24 @@ def get_db() -> Generator[Session, None, None]:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Async database session dependency for `async def` routes.
+    
+    Usage:
+        @router.post("/votes")
+        async def cast_vote(db: AsyncSession = Depends(get_async_db)):
+            await db.execute(...)
+    
+    Sync crud helpers can be reused with `await db.run_sync(helper, ...)`.
+    
+    Yields:
+        Async database session
+    """
+    if AsyncSessionLocal is None:
+        raise RuntimeError("Database not initialized. Call init_db() first.")
+    
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -14,7 +14,11 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.config import settings
-from app.db.session import init_db, create_tables, close_db
+from app.db.session import init_db, create_tables, close_db, close_async_db
+from app.core.scheduler import scheduler
+from app.core.cache import feed_cache, unread_cache
+from app.core.counters import post_counter_buffer, counter_mode
+from app.core.jobs import register_jobs, flush_post_counters, last_reconcile, last_retention
 from app.api import auth
 
 # Configure logging
@@ -31,8 +35,8 @@ async def lifespan(app: FastAPI):
     Application lifespan manager.
     
     Handles startup and shutdown events:
-    - Startup: Initialize database connection and create tables
-    - Shutdown: Close database connections
+    - Startup: Initialize database connection, create tables, start periodic jobs
+    - Shutdown: Stop periodic jobs, flush write-behind counters, close database connections
     """
     # Startup
     logger.info("Starting application...")
@@ -53,6 +57,10 @@ async def lifespan(app: FastAPI):
         create_tables()
         logger.info("Database tables created/verified")
         
+        # Background maintenance (hot score decay, ...)
+        register_jobs(scheduler)
+        scheduler.start()
+        
         logger.info("Application startup complete")
     except Exception as e:
         logger.error(f"Startup failed: {e}")
@@ -62,7 +70,15 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("Shutting down application...")
+    await scheduler.stop()
+    if counter_mode() == "write_behind":
+        try:
+            flush_post_counters()
+            logger.info("Write-behind counters flushed")
+        except Exception as e:
+            logger.error(f"Final counter flush failed: {e}")
     close_db()
+    await close_async_db()
     logger.info("Database connections closed")
     logger.info("Application shutdown complete")
 
@@ -103,6 +119,38 @@ def health_check():
     return {"status": "ok"}
 
 
+@app.get("/health/cache", tags=["health"])
+def cache_stats():
+    """
+    Hit/miss counters for the in-process caches (per worker), for sizing.
+    """
+    return {"feed": feed_cache.stats(), "unread": unread_cache.stats()}
+
+
+@app.get("/health/counters", tags=["health"])
+def counter_stats():
+    """
+    Write-behind counter buffer depth and flush latency (per worker).
+    """
+    return post_counter_buffer.stats()
+
+
+@app.get("/health/reconcile", tags=["health"])
+def reconcile_stats():
+    """
+    Drift found and fixed by the last counter reconciliation run (per worker).
+    """
+    return last_reconcile
+
+
+@app.get("/health/retention", tags=["health"])
+def retention_stats():
+    """
+    What the last notification retention run deleted or dropped (per worker).
+    """
+    return last_retention
+
+
 # Include API routers
 app.include_router(auth.router, prefix="/auth", tags=["auth"])
 from app.api import posts, comments, reactions, users, votes
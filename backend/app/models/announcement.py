@@ -0,0 +1,34 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
+from sqlalchemy.orm import relationship
+from datetime import datetime
+from app.db.session import Base
+
+class Announcement(Base):
+    """
+    A broadcast to all users, stored once and merged into each user's
+    notification list at read time (fan-out on read) instead of copied into
+    one `notifications` row per user. Users see the announcements made since
+    they joined, except their own.
+    """
+    __tablename__ = "announcements"
+
+    id = Column(Integer, primary_key=True, index=True)
+    sender_id = Column(Integer, ForeignKey("users.id"), nullable=True) # Null for system announcements
+    title = Column(String)
+    message = Column(String)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+    sender = relationship("User")
+
+class AnnouncementRead(Base):
+    """Per-user read mark of an announcement; written only when the user reads it."""
+    __tablename__ = "announcement_reads"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    announcement_id = Column(Integer, ForeignKey("announcements.id", ondelete="CASCADE"), primary_key=True)
+    read_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        # Retention deletes reads with their announcement
+        Index("ix_announcement_reads_announcement_id", "announcement_id"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.db.session import Base
@@ -26,6 +26,14 @@ class Comment(Base):
     # Reactions relationship
     reactions = relationship("Reaction", backref="comment", foreign_keys="Reaction.comment_id")
 
+    __table_args__ = (
+        # Top-level page of a thread (parent_id IS NULL) in keyset order; its
+        # post_id prefix also serves per-post counts
+        Index("ix_comments_post_id_parent_id_created_at_id", "post_id", "parent_id", "created_at", "id"),
+        # Replies of a comment in keyset order
+        Index("ix_comments_parent_id_created_at_id", "parent_id", "created_at", "id"),
+    )
+
 # Add reactions relationship to Post as well
 from app.models.post import Post
 Post.reactions = relationship("Reaction", backref="post", foreign_keys="Reaction.post_id")
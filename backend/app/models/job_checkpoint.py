@@ -0,0 +1,15 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime
+from app.db.session import Base
+
+class JobCheckpoint(Base):
+    """
+    Resume point of an incremental background job, e.g. the last post id the
+    counter reconciler checked ("reconcile:posts"). Updated in the same
+    transaction as the work it covers.
+    """
+    __tablename__ = "job_checkpoints"
+
+    name = Column(String, primary_key=True)
+    position = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
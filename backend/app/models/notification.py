@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Index, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.db.session import Base
@@ -7,7 +7,7 @@ class Notification(Base):
     __tablename__ = "notifications"
 
     id = Column(Integer, primary_key=True, index=True)
-    recipient_id = Column(Integer, ForeignKey("users.id"), index=True)
+    recipient_id = Column(Integer, ForeignKey("users.id"))
     sender_id = Column(Integer, ForeignKey("users.id"), nullable=True) # Null for system announcements
     type = Column(String, index=True) # 'comment', 'upvote', 'announcement'
     title = Column(String)
@@ -16,6 +16,50 @@ class Notification(Base):
     reference_type = Column(String, nullable=True) # 'post', 'announcement'
     is_read = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Aggregation mode: actors folded into this row, and its "type:reference_type:reference_id"
+    actor_count = Column(Integer, default=1)
+    group_key = Column(String, nullable=True)
 
     recipient = relationship("User", foreign_keys=[recipient_id], backref="notifications_received")
     sender = relationship("User", foreign_keys=[sender_id], backref="notifications_sent")
+
+    __table_args__ = (
+        # A user's notifications newest first, keyset-paginated (also serves recipient_id lookups)
+        Index("ix_notifications_recipient_id_created_at_id", "recipient_id", "created_at", "id"),
+        # Upsert target of coalesced notifications (ungrouped rows have no group_key)
+        Index("uq_notifications_recipient_id_group_key", "recipient_id", "group_key", unique=True),
+        # Retention: oldest read notifications first
+        Index(
+            "ix_notifications_read_created_at", "created_at",
+            postgresql_where=text("is_read"), sqlite_where=text("is_read"),
+        ),
+    )
+
+class NotificationCounter(Base):
+    """
+    A user's unread notification count, changed by the same transaction that
+    inserts notifications or marks them read, so the badge is one row read.
+    Announcements are counted at read time (they aren't fanned out per user).
+    """
+    __tablename__ = "notification_counters"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    unread = Column(Integer, nullable=False, default=0)
+
+class NotificationActor(Base):
+    """
+    Distinct actors folded into a coalesced notification's current unread
+    group (aggregation mode), so a repeat actor is never counted twice and
+    the latest few can be named. Cleared when a read group starts over.
+    Not a foreign key: retention deletes these with their notification.
+    """
+    __tablename__ = "notification_actors"
+
+    notification_id = Column(Integer, primary_key=True)
+    actor_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    acted_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        # Latest actors of a group
+        Index("ix_notification_actors_notification_id_acted_at", "notification_id", "acted_at"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean, Float, Index, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.db.session import Base
@@ -9,6 +9,7 @@ class Post(Base):
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False)
     content = Column(Text, nullable=False)
+    excerpt = Column(String, nullable=True) # Feed preview, computed at write time
     created_at = Column(DateTime, default=datetime.utcnow)
     
     # Ghost Mode
@@ -20,6 +21,10 @@ class Post(Base):
     comments_count = Column(Integer, default=0)
     share_count = Column(Integer, default=0)  # Track share popularity
     
+    # Trending: time-decayed popularity, maintained on counter changes and
+    # refreshed periodically (see crud.post.recompute_hot_scores)
+    hot_score = Column(Float, default=0, index=True)
+    
     # Author (optional for now, can be linked to User if we enforce auth)
     author_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     author = relationship("User", backref="posts")
@@ -35,3 +40,16 @@ class Post(Base):
     media_url = Column(String, nullable=True)
     media_public_id = Column(String, nullable=True)
     media_type = Column(String, nullable=True) # image, video
+
+    # Keyset pagination for the feed: (created_at, id) newest-first, globally
+    # and within a department. B-trees scan backwards, so ASC serves DESC.
+    __table_args__ = (
+        Index("ix_posts_created_at_id", "created_at", "id"),
+        Index("ix_posts_department_created_at_id", "department", "created_at", "id"),
+        # The pinned set is tiny: a partial index keeps its lookup O(pinned)
+        Index(
+            "ix_posts_pinned", "created_at",
+            postgresql_where=text("is_pinned"),
+            sqlite_where=text("is_pinned"),
+        ),
+    )
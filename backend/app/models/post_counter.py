@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, ForeignKey
+from app.db.session import Base
+
+class PostCounter(Base):
+    """
+    One of COUNTER_SHARDS counter shards of a post. Writers add their delta
+    to a random shard so a hot post's increments don't queue on one row
+    lock; the rollup job folds shards into the `posts` columns and deletes
+    them. A post's true count is posts.<col> + sum over its shards.
+    """
+    __tablename__ = "post_counters"
+
+    post_id = Column(Integer, ForeignKey("posts.id", ondelete="CASCADE"), primary_key=True)
+    shard = Column(Integer, primary_key=True)
+    upvotes = Column(Integer, nullable=False, default=0)
+    downvotes = Column(Integer, nullable=False, default=0)
+    comments_count = Column(Integer, nullable=False, default=0)
+    share_count = Column(Integer, nullable=False, default=0)
@@ -1,8 +1,29 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, UniqueConstraint
+from sqlalchemy import Column, Integer, SmallInteger, ForeignKey, DateTime, UniqueConstraint
+from sqlalchemy.types import TypeDecorator
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.db.session import Base
 
+# Supported reactions, stored as their 1-based position. Append only:
+# codes are persisted in reactions and reaction_counts.
+EMOJIS = ("👍", "❤️", "🔥", "💡", "🎉", "🤔", "+1", "-1", "heart", "rocket")
+EMOJI_CODES = {emoji: code for code, emoji in enumerate(EMOJIS, start=1)}
+
+class EmojiCode(TypeDecorator):
+    """An emoji string in Python, its small integer code in the database."""
+    impl = SmallInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        if value not in EMOJI_CODES:
+            raise ValueError(f"Unsupported emoji: {value!r}")
+        return EMOJI_CODES[value]
+
+    def process_result_value(self, value, dialect):
+        return EMOJIS[value - 1] if value is not None else None
+
 class Reaction(Base):
     __tablename__ = "reactions"
 
@@ -13,7 +34,7 @@ class Reaction(Base):
     post_id = Column(Integer, ForeignKey("posts.id"), nullable=True)
     comment_id = Column(Integer, ForeignKey("comments.id"), nullable=True)
     
-    emoji = Column(String, nullable=False) # e.g., "+1", "-1", "heart", "rocket"
+    emoji = Column(EmojiCode, nullable=False) # one of EMOJIS
     created_at = Column(DateTime, default=datetime.utcnow)
 
     # Relationships
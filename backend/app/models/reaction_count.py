@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, String
+from app.db.session import Base
+from app.models.reaction import EmojiCode
+
+class ReactionCount(Base):
+    """
+    Number of reactions per emoji on a post or comment, kept in step with
+    `reactions` by toggle_reaction in the same transaction, so reading a
+    target's counts is a primary-key range lookup instead of a GROUP BY.
+    Rows that drop to zero are kept (and skipped on read).
+    """
+    __tablename__ = "reaction_counts"
+
+    target_type = Column(String, primary_key=True)  # 'post' or 'comment'
+    target_id = Column(Integer, primary_key=True)
+    emoji = Column(EmojiCode, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, String, Index
+from app.db.session import Base
+
+class ResourceVersion(Base):
+    """
+    Change counter per cacheable resource scope, e.g. "post:42",
+    "feed:CSE", "comments:42", "notifications:7". Bumped inside the write
+    transaction, read by primary key to build ETags.
+    """
+    __tablename__ = "resource_versions"
+
+    scope = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        # Prefix reads (scope LIKE 'feed:%') for wildcard ETags; the primary
+        # key index can't serve LIKE under a non-C collation
+        Index(
+            "ix_resource_versions_scope_pattern", "scope",
+            postgresql_ops={"scope": "text_pattern_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, Table, Index
+from app.db.session import Base
+
+class Tag(Base):
+    __tablename__ = "tags"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, unique=True, nullable=False) # Normalized: stripped + lowercase
+
+# Join table: Post.tags (display string) is mirrored here for indexed filtering
+post_tags = Table(
+    "post_tags",
+    Base.metadata,
+    Column("post_id", Integer, ForeignKey("posts.id", ondelete="CASCADE"), primary_key=True),
+    Column("tag_id", Integer, ForeignKey("tags.id", ondelete="CASCADE"), primary_key=True),
+    # Tag-filtered feeds look up posts by tag
+    Index("ix_post_tags_tag_id_post_id", "tag_id", "post_id"),
+)
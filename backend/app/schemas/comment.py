@@ -21,6 +21,8 @@ class Comment(CommentBase):
     
     # We will compute these or fetch them
     replies: List['Comment'] = []
+    reply_count: int = 0
+    replies_cursor: Optional[str] = None # "Load more" cursor for the replies endpoint
     reactions: List[ReactionResponse] = []
     
     # Vote info
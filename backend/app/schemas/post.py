@@ -38,6 +38,7 @@ class Post(PostBase):
     comments_count: int = 0
     share_count: int = 0  # Track share popularity
     user_vote: Optional[int] = None # 1, -1, or None (if not voted)
+    excerpt: Optional[str] = None # Feed preview (view=summary)
     
     media_url: Optional[str] = None
     media_public_id: Optional[str] = None
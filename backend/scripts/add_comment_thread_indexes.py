@@ -0,0 +1,32 @@
+import sys
+import os
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.db import session
+from app.core.config import settings
+from sqlalchemy import text
+
+def add_comment_thread_indexes():
+    print("🔄 Migrating: Adding threaded pagination indexes to comments table...")
+    session.init_db(settings.DATABASE_URL)
+    try:
+        with session.engine.connect() as conn:
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_comments_post_id_parent_id_created_at_id "
+                "ON comments (post_id, parent_id, created_at, id)"
+            ))
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_comments_parent_id_created_at_id "
+                "ON comments (parent_id, created_at, id)"
+            ))
+            # Covered by the prefix of the first index
+            conn.execute(text("DROP INDEX IF EXISTS ix_comments_post_id"))
+            conn.commit()
+        print("✅ Migration Successful: Comment thread indexes added.")
+    except Exception as e:
+        print(f"❌ Migration Failed: {e}")
+
+if __name__ == "__main__":
+    add_comment_thread_indexes()
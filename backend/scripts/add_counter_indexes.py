@@ -0,0 +1,25 @@
+import sys
+import os
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.db import session
+from app.core.config import settings
+from sqlalchemy import text
+
+def add_counter_indexes():
+    print("🔄 Migrating: Adding per-target indexes to votes and comments tables...")
+    session.init_db(settings.DATABASE_URL)
+    try:
+        with session.engine.connect() as conn:
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_votes_post_id ON votes (post_id)"))
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_votes_comment_id ON votes (comment_id)"))
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_comments_post_id ON comments (post_id)"))
+            conn.commit()
+        print("✅ Migration Successful: Counter indexes added.")
+    except Exception as e:
+        print(f"❌ Migration Failed: {e}")
+
+if __name__ == "__main__":
+    add_counter_indexes()
@@ -0,0 +1,24 @@
+import sys
+import os
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.db import session
+from app.core.config import settings
+from sqlalchemy import text
+
+def add_feed_indexes():
+    print("🔄 Migrating: Adding keyset pagination indexes to posts table...")
+    session.init_db(settings.DATABASE_URL)
+    try:
+        with session.engine.connect() as conn:
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_posts_created_at_id ON posts (created_at, id)"))
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_posts_department_created_at_id ON posts (department, created_at, id)"))
+            conn.commit()
+        print("✅ Migration Successful: Feed indexes added.")
+    except Exception as e:
+        print(f"❌ Migration Failed: {e}")
+
+if __name__ == "__main__":
+    add_feed_indexes()
@@ -0,0 +1,35 @@
+import sys
+import os
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.db import session
+from app.core.config import settings
+from sqlalchemy import text
+
+def add_hot_score():
+    print("🔄 Migrating: Adding hot_score column to posts table...")
+    session.init_db(settings.DATABASE_URL)
+    try:
+        with session.engine.connect() as conn:
+            conn.execute(text("ALTER TABLE posts ADD COLUMN IF NOT EXISTS hot_score DOUBLE PRECISION DEFAULT 0"))
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_posts_hot_score ON posts (hot_score)"))
+            conn.commit()
+        print("✅ Migration Successful: hot_score column and index added.")
+    except Exception as e:
+        print(f"❌ Migration Failed: {e}")
+        return
+
+    # Backfill scores for everything inside the trending window
+    from app.models import user, comment, reaction  # noqa: F401 - register mappers
+    from app.crud.post import recompute_hot_scores
+    db = session.SessionLocal()
+    try:
+        updated = recompute_hot_scores(db)
+        print(f"✅ Backfilled hot_score for {updated} posts.")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    add_hot_score()
@@ -0,0 +1,31 @@
+import sys
+import os
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.db import session
+from app.core.config import settings
+from app.models import user, notification  # noqa: F401 - register mappers
+from sqlalchemy import text
+
+def add_notification_actors():
+    print("🔄 Migrating: Creating notification_actors table...")
+    session.init_db(settings.DATABASE_URL)
+    try:
+        notification.NotificationActor.__table__.create(bind=session.engine, checkfirst=True)
+        with session.engine.connect() as conn:
+            # Existing groups only know their latest actor; their counts are kept
+            conn.execute(text(
+                "INSERT INTO notification_actors (notification_id, actor_id, acted_at) "
+                "SELECT id, sender_id, created_at FROM notifications "
+                "WHERE group_key IS NOT NULL AND sender_id IS NOT NULL "
+                "ON CONFLICT DO NOTHING"
+            ))
+            conn.commit()
+        print("✅ Migration Successful: notification_actors table created.")
+    except Exception as e:
+        print(f"❌ Migration Failed: {e}")
+
+if __name__ == "__main__":
+    add_notification_actors()
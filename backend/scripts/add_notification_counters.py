@@ -0,0 +1,31 @@
+import sys
+import os
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.db import session
+from app.core.config import settings
+
+def add_notification_counters():
+    print("🔄 Migrating: Creating and backfilling notification_counters...")
+    session.init_db(settings.DATABASE_URL)
+    try:
+        from app.models import user, post, comment  # noqa: F401 - register mappers
+        from app.models.notification import NotificationCounter
+        from app.crud.notification import rebuild_unread_counters
+
+        session.Base.metadata.create_all(bind=session.engine, tables=[NotificationCounter.__table__])
+
+        db = session.SessionLocal()
+        try:
+            total = rebuild_unread_counters(db)
+            db.commit()
+        finally:
+            db.close()
+        print(f"✅ Migration Successful: Unread counters backfilled for {total} users.")
+    except Exception as e:
+        print(f"❌ Migration Failed: {e}")
+
+if __name__ == "__main__":
+    add_notification_counters()
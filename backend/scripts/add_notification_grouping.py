@@ -0,0 +1,29 @@
+import sys
+import os
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.db import session
+from app.core.config import settings
+from sqlalchemy import text
+
+def add_notification_grouping():
+    print("🔄 Migrating: Adding actor_count/group_key columns to notifications table...")
+    session.init_db(settings.DATABASE_URL)
+    try:
+        with session.engine.connect() as conn:
+            conn.execute(text("ALTER TABLE notifications ADD COLUMN IF NOT EXISTS actor_count INTEGER DEFAULT 1"))
+            conn.execute(text("ALTER TABLE notifications ADD COLUMN IF NOT EXISTS group_key VARCHAR"))
+            # Existing rows keep a NULL group_key, so they never conflict
+            conn.execute(text(
+                "CREATE UNIQUE INDEX IF NOT EXISTS uq_notifications_recipient_id_group_key "
+                "ON notifications (recipient_id, group_key)"
+            ))
+            conn.commit()
+        print("✅ Migration Successful: Notification grouping columns added.")
+    except Exception as e:
+        print(f"❌ Migration Failed: {e}")
+
+if __name__ == "__main__":
+    add_notification_grouping()
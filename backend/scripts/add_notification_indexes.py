@@ -0,0 +1,28 @@
+import sys
+import os
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.db import session
+from app.core.config import settings
+from sqlalchemy import text
+
+def add_notification_indexes():
+    print("🔄 Migrating: Adding keyset pagination index to notifications table...")
+    session.init_db(settings.DATABASE_URL)
+    try:
+        with session.engine.connect() as conn:
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_notifications_recipient_id_created_at_id "
+                "ON notifications (recipient_id, created_at, id)"
+            ))
+            # Covered by the prefix of the new index
+            conn.execute(text("DROP INDEX IF EXISTS ix_notifications_recipient_id"))
+            conn.commit()
+        print("✅ Migration Successful: Notification indexes added.")
+    except Exception as e:
+        print(f"❌ Migration Failed: {e}")
+
+if __name__ == "__main__":
+    add_notification_indexes()
@@ -0,0 +1,27 @@
+import sys
+import os
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.db import session
+from app.core.config import settings
+from sqlalchemy import text
+
+def add_notification_retention_index():
+    print("🔄 Migrating: Adding retention index to notifications table...")
+    session.init_db(settings.DATABASE_URL)
+    try:
+        with session.engine.connect() as conn:
+            # Partial: only read notifications are ever pruned row by row
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_notifications_read_created_at "
+                "ON notifications (created_at) WHERE is_read"
+            ))
+            conn.commit()
+        print("✅ Migration Successful: Notification retention index added.")
+    except Exception as e:
+        print(f"❌ Migration Failed: {e}")
+
+if __name__ == "__main__":
+    add_notification_retention_index()
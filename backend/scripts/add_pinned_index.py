@@ -0,0 +1,23 @@
+import sys
+import os
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.db import session
+from app.core.config import settings
+from sqlalchemy import text
+
+def add_pinned_index():
+    print("🔄 Migrating: Adding partial index for pinned posts...")
+    session.init_db(settings.DATABASE_URL)
+    try:
+        with session.engine.connect() as conn:
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_posts_pinned ON posts (created_at) WHERE is_pinned"))
+            conn.commit()
+        print("✅ Migration Successful: Pinned index added.")
+    except Exception as e:
+        print(f"❌ Migration Failed: {e}")
+
+if __name__ == "__main__":
+    add_pinned_index()
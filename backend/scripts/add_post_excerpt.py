@@ -0,0 +1,45 @@
+import sys
+import os
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.db import session
+from app.core.config import settings
+from sqlalchemy import text
+
+def add_post_excerpt(batch_size: int = 500):
+    print("🔄 Migrating: Adding excerpt column to posts table...")
+    session.init_db(settings.DATABASE_URL)
+    try:
+        with session.engine.connect() as conn:
+            conn.execute(text("ALTER TABLE posts ADD COLUMN IF NOT EXISTS excerpt VARCHAR"))
+            conn.commit()
+        print("✅ Migration Successful: excerpt column added.")
+    except Exception as e:
+        print(f"❌ Migration Failed: {e}")
+        return
+
+    # Backfill excerpts in batches
+    from app.models import user, comment, reaction  # noqa: F401 - register mappers
+    from app.models.post import Post
+    from app.crud.post import make_excerpt
+    from sqlalchemy import update
+    db = session.SessionLocal()
+    try:
+        total = 0
+        while True:
+            rows = db.query(Post.id, Post.content)\
+                .filter(Post.excerpt == None)\
+                .order_by(Post.id).limit(batch_size).all()
+            if not rows:
+                break
+            db.execute(update(Post), [{"id": r.id, "excerpt": make_excerpt(r.content)} for r in rows])
+            db.commit()
+            total += len(rows)
+        print(f"✅ Backfilled excerpts for {total} posts.")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    add_post_excerpt()
@@ -0,0 +1,44 @@
+import sys
+import os
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.db import session
+from app.core.config import settings
+
+def add_post_tags(batch_size: int = 500):
+    print("🔄 Migrating: Creating tags/post_tags tables and backfilling from posts.tags...")
+    session.init_db(settings.DATABASE_URL)
+    try:
+        from app.models import user, comment, reaction  # noqa: F401 - register mappers
+        from app.models.post import Post
+        from app.models.tag import Tag, post_tags
+        from app.crud.tag import set_post_tags
+
+        session.Base.metadata.create_all(bind=session.engine, tables=[Tag.__table__, post_tags])
+
+        db = session.SessionLocal()
+        try:
+            last_id = 0
+            total = 0
+            while True:
+                rows = db.query(Post.id, Post.tags)\
+                    .filter(Post.id > last_id)\
+                    .order_by(Post.id).limit(batch_size).all()
+                if not rows:
+                    break
+                for post_id, tags in rows:
+                    set_post_tags(db, post_id, tags)
+                db.commit()
+                total += len(rows)
+                last_id = rows[-1].id
+                print(f"  ...{total} posts")
+        finally:
+            db.close()
+        print(f"✅ Migration Successful: Tags backfilled for {total} posts.")
+    except Exception as e:
+        print(f"❌ Migration Failed: {e}")
+
+if __name__ == "__main__":
+    add_post_tags()
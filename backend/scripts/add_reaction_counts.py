@@ -0,0 +1,80 @@
+import sys
+import os
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.db import session
+from app.core.config import settings
+from sqlalchemy import text
+
+def add_reaction_counts():
+    print("🔄 Migrating: Emoji codes on reactions, creating and backfilling reaction_counts...")
+    session.init_db(settings.DATABASE_URL)
+    try:
+        from app.models import user, post, comment  # noqa: F401 - register mappers
+        from app.models.reaction import EMOJI_CODES, Reaction
+        from app.models.reaction_count import ReactionCount
+        from app.crud.reaction import rebuild_reaction_counts
+
+        with session.engine.connect() as conn:
+            if session.engine.dialect.name == "postgresql":
+                column_type = conn.execute(text(
+                    "SELECT data_type FROM information_schema.columns "
+                    "WHERE table_name = 'reactions' AND column_name = 'emoji'"
+                )).scalar()
+            else:
+                column_type = next(
+                    (row.type for row in conn.execute(text("PRAGMA table_info(reactions)")) if row.name == "emoji"), None
+                )
+            if column_type and column_type.lower() != "smallint":
+                # Reactions outside the supported set can't be stored as a code:
+                # stop rather than lose them
+                known = ", ".join(f"'{emoji}'" for emoji in EMOJI_CODES)
+                unknown = conn.execute(text(
+                    f"SELECT emoji, count(*) FROM reactions WHERE emoji NOT IN ({known}) GROUP BY emoji ORDER BY emoji"
+                )).all()
+                if unknown:
+                    for emoji, count in unknown:
+                        print(f"  ...{count} reactions with unsupported emoji {emoji!r}")
+                    print("❌ Migration Failed: append these to EMOJIS in app/models/reaction.py "
+                          "(or remove those reactions) and run again.")
+                    return
+
+                cases = " ".join(f"WHEN '{emoji}' THEN {code}" for emoji, code in EMOJI_CODES.items())
+                if session.engine.dialect.name == "postgresql":
+                    conn.execute(text(
+                        f"ALTER TABLE reactions ALTER COLUMN emoji TYPE SMALLINT USING CASE emoji {cases} END"
+                    ))
+                else:
+                    # SQLite can't change a column type (and a VARCHAR column would
+                    # store the codes as text): rebuild the table
+                    for index in conn.execute(text(
+                        "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'reactions' AND sql IS NOT NULL"
+                    )).scalars().all():
+                        conn.execute(text(f'DROP INDEX "{index}"'))
+                    conn.execute(text("ALTER TABLE reactions RENAME TO reactions_unconverted"))
+                    Reaction.__table__.create(bind=conn)
+                    conn.execute(text(
+                        "INSERT INTO reactions (id, user_id, post_id, comment_id, emoji, created_at) "
+                        f"SELECT id, user_id, post_id, comment_id, CASE emoji {cases} END, created_at "
+                        "FROM reactions_unconverted"
+                    ))
+                    conn.execute(text("DROP TABLE reactions_unconverted"))
+                print("  ...reactions.emoji converted to codes")
+            conn.commit()
+
+        session.Base.metadata.create_all(bind=session.engine, tables=[ReactionCount.__table__])
+
+        db = session.SessionLocal()
+        try:
+            total = rebuild_reaction_counts(db)
+            db.commit()
+        finally:
+            db.close()
+        print(f"✅ Migration Successful: {total} reaction counts backfilled.")
+    except Exception as e:
+        print(f"❌ Migration Failed: {e}")
+
+if __name__ == "__main__":
+    add_reaction_counts()
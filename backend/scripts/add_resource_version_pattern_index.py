@@ -0,0 +1,30 @@
+import sys
+import os
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.db import session
+from app.core.config import settings
+from sqlalchemy import text
+
+def add_resource_version_pattern_index():
+    print("🔄 Migrating: Versioning the all-departments feed by department...")
+    session.init_db(settings.DATABASE_URL)
+    try:
+        with session.engine.connect() as conn:
+            if conn.dialect.name == "postgresql":
+                # The "feed:*" ETag now reads every feed:<department> row by prefix
+                conn.execute(text(
+                    "CREATE INDEX IF NOT EXISTS ix_resource_versions_scope_pattern "
+                    "ON resource_versions (scope text_pattern_ops)"
+                ))
+            # No longer bumped; left alone it would only be read as a constant
+            conn.execute(text("DELETE FROM resource_versions WHERE scope IN ('feed:*', 'users')"))
+            conn.commit()
+        print("✅ Migration Successful: Feed and user version scopes updated.")
+    except Exception as e:
+        print(f"❌ Migration Failed: {e}")
+
+if __name__ == "__main__":
+    add_resource_version_pattern_index()
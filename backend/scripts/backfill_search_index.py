@@ -0,0 +1,29 @@
+import sys
+import os
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.db import session
+from app.core.config import settings
+
+def backfill_search_index():
+    print("🔄 Migrating: Building full-text search index for existing posts...")
+    session.init_db(settings.DATABASE_URL)
+    try:
+        # Registers models and creates the search column/FTS table if missing
+        from app.models import user, post, comment, reaction  # noqa: F401
+        from app.crud.search import ensure_search_schema, backfill_search_index as backfill
+        ensure_search_schema(session.engine)
+
+        db = session.SessionLocal()
+        try:
+            indexed = backfill(db)
+        finally:
+            db.close()
+        print(f"✅ Migration Successful: {indexed} posts indexed.")
+    except Exception as e:
+        print(f"❌ Migration Failed: {e}")
+
+if __name__ == "__main__":
+    backfill_search_index()
@@ -0,0 +1,109 @@
+"""
+Benchmark: read_posts serialization, ORM + Pydantic + stdlib json (old path)
+vs. projected rows + plain dicts + orjson (current path).
+
+Seeds a throwaway SQLite database, so it never touches the configured one.
+
+    python scripts/benchmark_feed_serialization.py [posts_per_page] [rounds]
+"""
+import sys
+import os
+import json
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.orm import joinedload
+
+from app.db import session
+from app.models import user, post, comment, reaction, vote, tag  # noqa: F401 - register mappers
+from app.models.post import Post as PostModel
+from app.models.user import User
+from app.schemas.post import Post
+from app.crud.post import get_feed, feed_row_to_dict, make_excerpt
+
+
+def seed(db, n_posts: int):
+    authors = [
+        User(email=f"bench{i}@example.com", username=f"bench{i}", full_name=f"Bench User {i}")
+        for i in range(20)
+    ]
+    db.add_all(authors)
+    db.flush()
+    now = datetime.utcnow()
+    db.add_all([
+        PostModel(
+            title=f"Benchmark post {i}",
+            content="Lorem ipsum dolor sit amet. " * 20,
+            excerpt=make_excerpt("Lorem ipsum dolor sit amet. " * 20),
+            department="CS",
+            tags="bench,feed",
+            author_id=authors[i % len(authors)].id,
+            is_anonymous=(i % 7 == 0),
+            created_at=now - timedelta(minutes=i),
+            upvotes=i % 13,
+            downvotes=i % 3,
+        )
+        for i in range(n_posts)
+    ])
+    db.commit()
+
+
+def old_path(db, limit: int) -> bytes:
+    posts = db.query(PostModel).options(joinedload(PostModel.author))\
+        .order_by(PostModel.created_at.desc()).limit(limit).all()
+    for p in posts:
+        if p.is_anonymous:
+            p.author = None
+            p.author_id = None
+    validated = [Post.model_validate(p) for p in posts]
+    body = json.dumps(jsonable_encoder(validated)).encode()
+    db.rollback()  # drop the redaction edits and identity map, like a request ending
+    return body
+
+
+def new_path(db, limit: int) -> bytes:
+    rows = get_feed(db, limit=limit)
+    return orjson.dumps([feed_row_to_dict(row) for row in rows])
+
+
+def timeit(fn, db, limit: int, rounds: int) -> float:
+    fn(db, limit)  # warm-up
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn(db, limit)
+    return (time.perf_counter() - start) / rounds * 1000
+
+
+def benchmark(limit: int = 100, rounds: int = 200):
+    tmpdir = tempfile.mkdtemp()
+    session.init_db(f"sqlite:///{tmpdir}/benchmark.db")
+    session.Base.metadata.create_all(bind=session.engine)
+    db = session.SessionLocal()
+    try:
+        seed(db, limit * 5)
+
+        # Both paths must produce the same payload
+        old = json.loads(old_path(db, limit))
+        new = json.loads(new_path(db, limit))
+        assert old == new, "fast path payload differs from the Pydantic path"
+
+        old_ms = timeit(old_path, db, limit, rounds)
+        new_ms = timeit(new_path, db, limit, rounds)
+        print(f"read_posts, {limit} posts/page, {rounds} rounds")
+        print(f"  ORM + Pydantic + json : {old_ms:8.2f} ms/page")
+        print(f"  rows + dicts + orjson : {new_ms:8.2f} ms/page")
+        print(f"  speedup               : {old_ms / new_ms:8.2f}x")
+    finally:
+        db.close()
+        session.close_db()
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    benchmark(*args)
@@ -0,0 +1,150 @@
+"""
+Benchmark: vote throughput on a single hot post with 1, 8 and 32 concurrent
+voters, for each post counter mode (inline `posts` row update, sharded
+post_counters, write-behind buffer).
+
+Each voter thread toggles its own vote on the same post through
+crud.vote.apply_vote, doing the same counter work cast_vote does in that
+mode, and commits. Counters are checked against the votes table after each
+run.
+
+Seeds a throwaway SQLite database by default. SQLite serializes all writers
+on one database lock, so the interesting numbers come from PostgreSQL:
+
+    BENCH_DATABASE_URL=postgresql://... python scripts/benchmark_vote_counters.py [votes_per_voter] [shards]
+"""
+import sys
+import os
+import tempfile
+import threading
+import time
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.db.session import Base
+from app.models import user, post, comment, reaction, vote, tag, resource_version, post_counter  # noqa: F401 - register mappers
+from app.models.post import Post
+from app.models.post_counter import PostCounter
+from app.models.user import User
+from app.models.vote import Vote
+from app.core.counters import CounterBuffer
+from app.crud.vote import apply_vote
+from app.crud.post import apply_counter_deltas
+from app.crud.post_counter import increment_shard, rollup_counter_shards
+from app.crud.resource_version import bump_versions, post_scopes
+
+MODES = ("inline", "sharded", "write_behind")
+VOTERS = (1, 8, 32)
+
+
+def cast(db, mode: str, buffer: CounterBuffer, user_id: int, post_id: int) -> None:
+    """One cast_vote transaction, minus HTTP and notifications."""
+    result = apply_vote(db, user_id, 1, post_id, defer_post_counters=(mode != "inline"))
+    target = result["target"]
+    if mode == "inline":
+        bump_versions(db, *post_scopes(target.id, target.department))
+    elif mode == "sharded":
+        increment_shard(db, target.id, **result["deltas"])
+    db.commit()
+    if mode == "write_behind":
+        buffer.add(target.id, **result["deltas"])
+
+
+def run(SessionLocal, mode: str, user_ids: list, post_id: int, votes_per_voter: int) -> float:
+    buffer = CounterBuffer(max_events=10 ** 9)
+    errors = []
+
+    def voter(user_id: int):
+        db = SessionLocal()
+        try:
+            for _ in range(votes_per_voter):
+                cast(db, mode, buffer, user_id, post_id)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            db.close()
+
+    threads = [threading.Thread(target=voter, args=(uid,)) for uid in user_ids]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    if errors:
+        raise errors[0]
+
+    # Settle deferred counters the way the background jobs would
+    db = SessionLocal()
+    try:
+        if mode == "sharded":
+            rollup_counter_shards(db)
+        elif mode == "write_behind":
+            deltas, _ = buffer.drain()
+            apply_counter_deltas(db, deltas)
+            db.commit()
+        row = db.query(Post.upvotes, Post.downvotes).filter(Post.id == post_id).one()
+        up = db.query(func.count(Vote.id)).filter(Vote.post_id == post_id, Vote.vote_type == 1).scalar()
+        assert (row.upvotes, row.downvotes) == (up, 0), f"{mode}: counters {tuple(row)} != votes table {up}"
+    finally:
+        db.close()
+    return len(user_ids) * votes_per_voter / elapsed
+
+
+def reset(SessionLocal, post_id: int) -> None:
+    db = SessionLocal()
+    db.query(Vote).filter(Vote.post_id == post_id).delete()
+    db.query(PostCounter).filter(PostCounter.post_id == post_id).delete()
+    db.query(Post).filter(Post.id == post_id).update({"upvotes": 0, "downvotes": 0})
+    db.commit()
+    db.close()
+
+
+def benchmark(votes_per_voter: int = 50, shards: int = 16):
+    settings.COUNTER_SHARDS = shards
+    url = os.environ.get("BENCH_DATABASE_URL")
+    if url:
+        engine = create_engine(url, pool_size=max(VOTERS), max_overflow=0)
+    else:
+        tmpdir = tempfile.mkdtemp()
+        engine = create_engine(f"sqlite:///{tmpdir}/benchmark.db", connect_args={"timeout": 60})
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    db = SessionLocal()
+    users = [User(email=f"bench{i}@example.com", username=f"bench{i}", full_name=f"Bench User {i}") for i in range(max(VOTERS))]
+    db.add_all(users)
+    db.flush()
+    hot = Post(title="Viral post", content="Everyone is voting", department="CS", author_id=users[0].id)
+    db.add(hot)
+    db.commit()
+    user_ids, post_id = [u.id for u in users], hot.id
+    db.close()
+
+    print(f"Votes on one post, {votes_per_voter} votes per voter, {shards} shards ({engine.dialect.name})")
+    print(f"  {'voters':>6} " + " ".join(f"{mode:>14}" for mode in MODES) + "   (votes/s)")
+    try:
+        for n in VOTERS:
+            rates = []
+            for mode in MODES:
+                reset(SessionLocal, post_id)
+                rates.append(run(SessionLocal, mode, user_ids[:n], post_id, votes_per_voter))
+            print(f"  {n:>6} " + " ".join(f"{rate:>14.0f}" for rate in rates))
+    finally:
+        reset(SessionLocal, post_id)
+        db = SessionLocal()
+        db.query(Post).filter(Post.id == post_id).delete()
+        db.query(User).filter(User.id.in_(user_ids)).delete()
+        db.commit()
+        db.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    benchmark(*args)
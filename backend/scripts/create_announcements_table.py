@@ -0,0 +1,25 @@
+import sys
+import os
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.db import session
+from app.core.config import settings
+from app.models.announcement import Announcement, AnnouncementRead
+from app.models.user import User # Required for FK
+
+
+def create_announcements_table():
+    print("🔄 Migrating: Creating announcements/announcement_reads tables...")
+    session.init_db(settings.DATABASE_URL)
+    try:
+        session.Base.metadata.create_all(
+            bind=session.engine, tables=[Announcement.__table__, AnnouncementRead.__table__]
+        )
+        print("✅ Migration Successful: Announcement tables created.")
+    except Exception as e:
+        print(f"❌ Migration Failed: {e}")
+
+if __name__ == "__main__":
+    create_announcements_table()
@@ -0,0 +1,101 @@
+"""
+Convert `notifications` into a table range-partitioned by month on
+created_at (PostgreSQL only), so the notification_retention job can drop
+expired months whole, once they hold no unread rows, instead of deleting
+row by row. Retention stays off until NOTIFICATION_RETENTION_DAYS is set.
+
+The original table is kept as `notifications_unpartitioned` (indexes
+dropped) until you drop it yourself. The primary key becomes
+(id, created_at), since partition keys must be part of unique indexes.
+For the same reason the (recipient_id, group_key) index can't exist, so
+notification coalescing (NOTIFICATION_COALESCE) is not available on a
+partitioned table.
+
+    python scripts/partition_notifications.py
+"""
+import sys
+import os
+from datetime import datetime
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.db import session
+from app.core.config import settings
+from sqlalchemy import text
+
+OLD_INDEXES = (
+    "ix_notifications_id", "ix_notifications_type", "ix_notifications_recipient_id",
+    "ix_notifications_recipient_id_created_at_id", "ix_notifications_read_created_at",
+    "uq_notifications_recipient_id_group_key",
+)
+
+def partition_notifications():
+    print("🔄 Migrating: Partitioning notifications table by month...")
+    session.init_db(settings.DATABASE_URL)
+    if session.engine.dialect.name != "postgresql":
+        print("❌ Migration Failed: Partitioning requires PostgreSQL.")
+        return
+    if settings.NOTIFICATION_COALESCE:
+        print("❌ Migration Failed: Turn off NOTIFICATION_COALESCE first (its unique index can't be partitioned).")
+        return
+    try:
+        from app.models import user, post, comment  # noqa: F401 - register mappers
+        from app.crud.retention import month_start, partition_name
+
+        with session.engine.begin() as conn:
+            if conn.execute(text(
+                "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table p "
+                "JOIN pg_class c ON c.oid = p.partrelid WHERE c.relname = 'notifications')"
+            )).scalar():
+                print("✅ Migration Successful: notifications is already partitioned.")
+                return
+
+            conn.execute(text("LOCK TABLE notifications IN ACCESS EXCLUSIVE MODE"))
+            conn.execute(text("UPDATE notifications SET created_at = now() AT TIME ZONE 'utc' WHERE created_at IS NULL"))
+            oldest = conn.execute(text("SELECT min(created_at) FROM notifications")).scalar()
+
+            # Keep the old table aside; index and constraint names are schema-wide
+            conn.execute(text("ALTER TABLE notifications RENAME TO notifications_unpartitioned"))
+            conn.execute(text("ALTER TABLE notifications_unpartitioned RENAME CONSTRAINT notifications_pkey TO notifications_unpartitioned_pkey"))
+            for index in OLD_INDEXES:
+                conn.execute(text(f"DROP INDEX IF EXISTS {index}"))
+
+            conn.execute(text(
+                "CREATE TABLE notifications (LIKE notifications_unpartitioned INCLUDING DEFAULTS) "
+                "PARTITION BY RANGE (created_at)"
+            ))
+            conn.execute(text("ALTER TABLE notifications ALTER COLUMN created_at SET NOT NULL"))
+            conn.execute(text("ALTER TABLE notifications ADD PRIMARY KEY (id, created_at)"))
+            conn.execute(text("ALTER TABLE notifications ADD FOREIGN KEY (recipient_id) REFERENCES users (id)"))
+            conn.execute(text("ALTER TABLE notifications ADD FOREIGN KEY (sender_id) REFERENCES users (id)"))
+            conn.execute(text("ALTER SEQUENCE notifications_id_seq OWNED BY notifications.id"))
+
+            # Catch-all for rows outside the monthly ranges
+            conn.execute(text("CREATE TABLE notifications_default PARTITION OF notifications DEFAULT"))
+            now = datetime.utcnow()
+            month = month_start(oldest or now)
+            last = month_start(now, settings.NOTIFICATION_PARTITION_MONTHS_AHEAD)
+            count = 0
+            while month <= last:
+                conn.execute(text(
+                    f"CREATE TABLE {partition_name(month)} PARTITION OF notifications "
+                    f"FOR VALUES FROM ('{month.isoformat()}') TO ('{month_start(month, 1).isoformat()}')"
+                ))
+                month = month_start(month, 1)
+                count += 1
+
+            conn.execute(text("INSERT INTO notifications SELECT * FROM notifications_unpartitioned"))
+            conn.execute(text(
+                "CREATE INDEX ix_notifications_recipient_id_created_at_id "
+                "ON notifications (recipient_id, created_at, id)"
+            ))
+            conn.execute(text("CREATE INDEX ix_notifications_read_created_at ON notifications (created_at) WHERE is_read"))
+            conn.execute(text("CREATE INDEX ix_notifications_type ON notifications (type)"))
+        print(f"✅ Migration Successful: notifications split into {count} monthly partitions.")
+        print("   Drop notifications_unpartitioned once you have checked the result.")
+    except Exception as e:
+        print(f"❌ Migration Failed: {e}")
+
+if __name__ == "__main__":
+    partition_notifications()
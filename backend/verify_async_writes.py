@@ -0,0 +1,120 @@
+"""
+Verify that the async write routes don't block the event loop.
+
+A second connection holds the SQLite write lock for HOLD seconds while two
+users vote on the same post. With the async session the votes wait for the
+lock off the event loop, so a /health request sent meanwhile still answers
+immediately and both votes finish together once the lock is released. With
+a blocking sync session inside `async def`, /health would wait for them.
+
+Runs against a throwaway SQLite database:
+
+    python verify_async_writes.py
+"""
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import httpx
+
+from app.main import app
+from app.db import session
+from app.core.security import create_access_token
+from app.models.user import User
+from app.models.post import Post
+
+HOLD = 1.0
+
+
+def hold_write_lock(db_path: str, ready: threading.Event):
+    conn = sqlite3.connect(db_path)
+    conn.execute("BEGIN IMMEDIATE")
+    ready.set()
+    time.sleep(HOLD)
+    conn.commit()
+    conn.close()
+
+
+async def timed(client: httpx.AsyncClient, label: str, timeline: list, method: str, url: str, **kwargs):
+    start = time.perf_counter()
+    response = await client.request(method, url, **kwargs)
+    timeline.append((time.perf_counter() - start, label, response.status_code))
+    return response
+
+
+async def run(db_path: str, post_id: int, tokens: list):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        ready = threading.Event()
+        locker = threading.Thread(target=hold_write_lock, args=(db_path, ready))
+        locker.start()
+        ready.wait()
+
+        timeline = []
+        votes = [
+            timed(client, f"vote user{i}", timeline, "POST", "/votes/",
+                  json={"post_id": post_id, "vote_type": 1},
+                  headers={"Authorization": f"Bearer {token}"})
+            for i, token in enumerate(tokens)
+        ]
+
+        async def health_probe():
+            await asyncio.sleep(0.1)  # votes are now waiting on the lock
+            await timed(client, "health", timeline, "GET", "/health")
+
+        await asyncio.gather(*votes, health_probe())
+        locker.join()
+        return sorted(timeline)
+
+
+def verify_async_writes():
+    print("Verifying async write routes interleave...")
+    tmpdir = tempfile.mkdtemp()
+    db_path = os.path.join(tmpdir, "verify.db")
+    session.init_db(f"sqlite:///{db_path}")
+    session.create_tables()
+
+    db = session.SessionLocal()
+    users = [User(email=f"voter{i}@example.com", username=f"voter{i}", full_name=f"Voter {i}") for i in range(2)]
+    author = User(email="author@example.com", username="author", full_name="Author")
+    db.add_all(users + [author])
+    db.commit()
+    post = Post(title="Hot post", content="Vote on me", department="CS", author_id=author.id)
+    db.add(post)
+    db.commit()
+    post_id = post.id
+    tokens = [create_access_token({"sub": u.email}) for u in users]
+    db.close()
+
+    timeline = asyncio.run(run(db_path, post_id, tokens))
+    for elapsed, label, status in timeline:
+        print(f"  {elapsed:6.3f}s  {label:<12} -> {status}")
+
+    health = next(t for t in timeline if t[1] == "health")
+    vote_times = [t[0] for t in timeline if t[1].startswith("vote")]
+    session.close_db()
+
+    ok = True
+    if health[0] > HOLD / 2:
+        print(f"❌ /health waited {health[0]:.2f}s behind the votes: event loop was blocked")
+        ok = False
+    if any(t < HOLD * 0.8 for t in vote_times):
+        print("❌ A vote finished while the write lock was still held")
+        ok = False
+    if max(vote_times) > HOLD * 1.8:
+        print("❌ Votes ran one after the other instead of waiting concurrently")
+        ok = False
+    if ok:
+        print("✅ Votes waited on the database concurrently without blocking the event loop")
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if verify_async_writes() else 1)
@@ -0,0 +1,90 @@
+"""
+Deleting a comment must never drive posts.comments_count below zero.
+
+Seeds a post whose stored comments_count is already 0 but which still has a
+comment (a count that drifted, or a comment inserted behind the API's back)
+on a throwaway SQLite database, deletes that comment through the endpoint in
+inline mode and in sharded mode followed by a shard rollup, and checks the
+count and hot score stay at 0. Also checks a normal delete still decrements.
+
+    python verify_comment_delete.py
+"""
+import os
+import sys
+import tempfile
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.db import session
+from app.models import user, post, comment, post_counter  # noqa: F401 - register mappers
+from app.models.user import User
+from app.models.post import Post
+from app.models.comment import Comment
+from app.core.config import settings
+from app.api.comments import delete_comment_endpoint
+from app.crud.post_counter import rollup_counter_shards
+
+
+def seed(db, author: User, comments_count: int, n_comments: int = 1):
+    thread = Post(title="Thread", content="Discuss", department="CS", author_id=author.id,
+                  comments_count=comments_count, hot_score=0.0)
+    db.add(thread)
+    db.flush()
+    comments = [Comment(content=f"Comment {i}", post_id=thread.id, author_id=author.id) for i in range(n_comments)]
+    db.add_all(comments)
+    db.commit()
+    return thread.id, [c.id for c in comments]
+
+
+def stored_counts(db, post_id: int):
+    db.expire_all()
+    row = db.get(Post, post_id)
+    return row.comments_count, row.hot_score
+
+
+def check(db, author: User, mode: str, shards: int, comments_count: int, expected: int) -> bool:
+    settings.COUNTER_SHARDS = shards
+    post_id, comment_ids = seed(db, author, comments_count, n_comments=max(comments_count, 1))
+    delete_comment_endpoint(post_id, comment_ids[0], db=db, current_user=author)
+    if shards:
+        rollup_counter_shards(db)
+
+    count, hot_score = stored_counts(db, post_id)
+    if count != expected:
+        print(f"❌ {mode}: comments_count {comments_count} -> {count} after a delete, expected {expected}")
+        return False
+    if expected == 0 and (hot_score or 0) < 0:
+        print(f"❌ {mode}: hot_score went negative ({hot_score}) with comments_count at 0")
+        return False
+    print(f"✅ {mode}: comments_count {comments_count} -> {count} after a delete")
+    return True
+
+
+def verify_comment_delete():
+    print("Verifying comment deletes keep comments_count at or above 0...")
+    tmpdir = tempfile.mkdtemp()
+    session.init_db(f"sqlite:///{tmpdir}/verify.db")
+    session.Base.metadata.create_all(bind=session.engine)
+
+    db = session.SessionLocal()
+    shards = settings.COUNTER_SHARDS
+    try:
+        author = User(email="author@example.com", username="author", full_name="Author")
+        db.add(author)
+        db.commit()
+
+        ok = True
+        ok &= check(db, author, "inline", 0, comments_count=0, expected=0)
+        ok &= check(db, author, "inline", 0, comments_count=2, expected=1)
+        ok &= check(db, author, "sharded", 4, comments_count=0, expected=0)
+        ok &= check(db, author, "sharded", 4, comments_count=2, expected=1)
+        return ok
+    finally:
+        settings.COUNTER_SHARDS = shards
+        db.close()
+        session.close_db()
+
+
+if __name__ == "__main__":
+    sys.exit(0 if verify_comment_delete() else 1)
@@ -0,0 +1,102 @@
+"""
+Query-count regression check for get_comments_by_post.
+
+Loading a thread must cost a fixed number of queries however many comments
+it has: comments, reaction counts, the viewer's reactions and the viewer's
+votes. Seeds a 300-comment thread with reactions and votes on a throwaway
+SQLite database and counts the statements actually sent.
+
+    python verify_comment_queries.py [comments]
+"""
+import os
+import sys
+import tempfile
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import event
+
+from app.db import session
+from app.models import user, post, comment, reaction, reaction_count, vote  # noqa: F401 - register mappers
+from app.models.user import User
+from app.models.post import Post
+from app.models.comment import Comment
+from app.models.reaction import Reaction
+from app.models.vote import Vote
+from app.schemas.comment import Comment as CommentSchema
+from app.crud.comment import get_comments_by_post
+from app.crud.reaction import rebuild_reaction_counts
+
+MAX_QUERIES = 4
+EMOJIS = ["+1", "heart", "rocket"]
+
+
+def seed(db, n_comments: int):
+    users = [User(email=f"reader{i}@example.com", username=f"reader{i}", full_name=f"Reader {i}") for i in range(3)]
+    db.add_all(users)
+    db.flush()
+    thread = Post(title="Long thread", content="Discuss", department="CS", author_id=users[0].id)
+    db.add(thread)
+    db.flush()
+    comments = [Comment(content=f"Comment {i}", post_id=thread.id, author_id=users[i % 3].id) for i in range(n_comments)]
+    db.add_all(comments)
+    db.flush()
+    for i, c in enumerate(comments):
+        for u in users[: i % 3 + 1]:
+            db.add(Reaction(user_id=u.id, comment_id=c.id, emoji=EMOJIS[i % len(EMOJIS)]))
+        if i % 2:
+            db.add(Vote(user_id=users[0].id, comment_id=c.id, vote_type=1))
+    db.flush()
+    rebuild_reaction_counts(db)
+    db.commit()
+    return thread.id, users[0].id
+
+
+def verify_comment_queries(n_comments: int = 300):
+    print(f"Verifying query count for a {n_comments}-comment thread...")
+    tmpdir = tempfile.mkdtemp()
+    session.init_db(f"sqlite:///{tmpdir}/verify.db")
+    session.Base.metadata.create_all(bind=session.engine)
+
+    db = session.SessionLocal()
+    post_id, viewer_id = seed(db, n_comments)
+    db.close()
+
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    db = session.SessionLocal()
+    event.listen(session.engine, "before_cursor_execute", count)
+    try:
+        thread = get_comments_by_post(db, post_id, user_id=viewer_id, voter_id=viewer_id)
+        # Serializing must not lazy-load anything either
+        payload = [CommentSchema.model_validate(c).model_dump() for c in thread]
+    finally:
+        event.remove(session.engine, "before_cursor_execute", count)
+        db.close()
+        session.close_db()
+
+    ok = True
+    if len(payload) != n_comments:
+        print(f"❌ Expected {n_comments} comments, got {len(payload)}")
+        ok = False
+    reacted = sum(1 for c in payload for r in c["reactions"] if r["user_reacted"])
+    if reacted != n_comments:
+        print(f"❌ Expected the viewer's reaction on every comment, found {reacted}")
+        ok = False
+    if len(statements) > MAX_QUERIES:
+        print(f"❌ {len(statements)} queries for {n_comments} comments (max {MAX_QUERIES}):")
+        for statement in statements[:10]:
+            print(f"   {' '.join(statement.split())[:100]}")
+        ok = False
+    if ok:
+        print(f"✅ {n_comments} comments with reactions and votes in {len(statements)} queries")
+    return ok
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:2]]
+    sys.exit(0 if verify_comment_queries(*args) else 1)
@@ -0,0 +1,151 @@
+"""
+Fake-clock check for the pin sweeper.
+
+Runs the real Scheduler with an injected sleep and the pin_sweeper job with
+an injected `now`, so an hour of sweeps takes milliseconds. Seeds two pinned
+posts on a throwaway SQLite database, one expiring in 30 minutes and one in
+3 days, then advances the clock sweep by sweep: the first pin must survive
+every sweep before its expiry and be gone from the feed after it, the second
+must stay, and the feed's cache and ETag versions must change exactly when a
+pin is swept.
+
+    python verify_pin_sweeper.py
+"""
+import asyncio
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.db import session
+from app.models import user, post, comment, reaction, tag  # noqa: F401 - register mappers
+from app.models.user import User
+from app.models.post import Post
+from app.core.cache import versions, feed_scope
+from app.core.config import settings
+from app.core.jobs import sweep_expired_pins
+from app.core.scheduler import Scheduler
+from app.crud.post import get_pinned
+from app.crud.resource_version import get_versions
+
+DEPARTMENT = "CS"
+
+
+class FakeClock:
+    """
+    Stands in for asyncio.sleep: a sleeping job wakes only when advance()
+    moves `now` past its deadline, and advance() returns once every woken
+    job has run and gone back to sleep.
+    """
+
+    def __init__(self, now: datetime):
+        self.now = now
+        self._sleepers = []
+
+    async def sleep(self, seconds: float) -> None:
+        wake = asyncio.get_running_loop().create_future()
+        self._sleepers.append((self.now + timedelta(seconds=seconds), wake))
+        await wake
+
+    async def advance(self, seconds: float) -> None:
+        self.now += timedelta(seconds=seconds)
+        sleeping = len(self._sleepers)
+        due = [(at, wake) for at, wake in self._sleepers if at <= self.now]
+        self._sleepers = [(at, wake) for at, wake in self._sleepers if at > self.now]
+        for _, wake in due:
+            wake.set_result(None)
+        for _ in range(500):
+            if len(self._sleepers) >= sleeping:
+                return
+            await asyncio.sleep(0.01)
+        raise TimeoutError("Scheduled job did not go back to sleep")
+
+
+def seed(db, now: datetime):
+    author = User(email="admin@example.com", username="admin", full_name="Admin", role="admin")
+    db.add(author)
+    db.flush()
+    soon = Post(title="Exam hall change", content="Room 4", department=DEPARTMENT, author_id=author.id,
+                is_pinned=True, pinned_until=now + timedelta(minutes=30))
+    later = Post(title="Fest registrations", content="Open", department=DEPARTMENT, author_id=author.id,
+                 is_pinned=True, pinned_until=now + timedelta(days=3))
+    db.add_all([soon, later])
+    db.commit()
+    return soon.id, later.id
+
+
+def feed_state():
+    """(pinned post ids in the feed, in-process cache version, database ETag version) of the department feed."""
+    db = session.SessionLocal()
+    try:
+        pinned = {row.id for row in get_pinned(db, DEPARTMENT)}
+        return pinned, versions.get(feed_scope(DEPARTMENT)), get_versions(db, [f"feed:{DEPARTMENT}"])[f"feed:{DEPARTMENT}"]
+    finally:
+        db.close()
+
+
+async def run(clock: FakeClock, soon_id: int, later_id: int) -> bool:
+    scheduler = Scheduler(sleep=clock.sleep)
+    scheduler.add_job("pin_sweeper", settings.PIN_SWEEP_SECONDS, lambda: sweep_expired_pins(clock.now))
+    scheduler.start()
+    await asyncio.sleep(0)  # let the job reach its first sleep
+
+    ok = True
+    pinned, cache_version, etag_version = feed_state()
+    if pinned != {soon_id, later_id}:
+        print(f"❌ Expected both posts pinned before any sweep, got {sorted(pinned)}")
+        ok = False
+
+    expires_at = clock.now + timedelta(minutes=30)
+    sweeps = 0
+    try:
+        while clock.now + timedelta(seconds=settings.PIN_SWEEP_SECONDS) < expires_at:
+            await clock.advance(settings.PIN_SWEEP_SECONDS)
+            sweeps += 1
+            if feed_state() != (pinned, cache_version, etag_version):
+                print(f"❌ Feed changed at sweep {sweeps}, before any pin expired")
+                ok = False
+                break
+
+        # First sweep past the expiry
+        await clock.advance(settings.PIN_SWEEP_SECONDS)
+        sweeps += 1
+        after, new_cache_version, new_etag_version = feed_state()
+    finally:
+        await scheduler.stop()
+
+    if after != {later_id}:
+        print(f"❌ Expected only post {later_id} pinned after sweep {sweeps}, got {sorted(after)}")
+        ok = False
+    if new_cache_version == cache_version:
+        print("❌ Feed cache version unchanged after the sweep, stale pinned sets would be served")
+        ok = False
+    if new_etag_version == etag_version:
+        print("❌ Feed ETag version unchanged after the sweep, clients would get 304 with the old pin")
+        ok = False
+    if ok:
+        print(f"✅ Expired pin swept on fake-clock sweep {sweeps}, unexpired pin kept, feed versions bumped")
+    return ok
+
+
+def verify_pin_sweeper():
+    print("Verifying the pin sweeper against a fake clock...")
+    tmpdir = tempfile.mkdtemp()
+    session.init_db(f"sqlite:///{tmpdir}/verify.db")
+    session.Base.metadata.create_all(bind=session.engine)
+
+    now = datetime.utcnow()
+    db = session.SessionLocal()
+    soon_id, later_id = seed(db, now)
+    db.close()
+    try:
+        return asyncio.run(run(FakeClock(now), soon_id, later_id))
+    finally:
+        session.close_db()
+
+
+if __name__ == "__main__":
+    sys.exit(0 if verify_pin_sweeper() else 1)
@@ -0,0 +1,99 @@
+"""
+Verify that concurrent votes keep the cached counters in line with the
+`votes` table.
+
+Many users hammer one post (and one comment) at the same time with adds,
+switches, toggles and same-user double clicks. Afterwards `upvotes` /
+`downvotes` on both targets must equal what the `votes` rows add up to.
+
+Runs against a throwaway SQLite database:
+
+    python verify_vote_concurrency.py [users] [rounds]
+"""
+import asyncio
+import os
+import random
+import sys
+import tempfile
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import httpx
+from sqlalchemy import func
+
+from app.main import app
+from app.db import session
+from app.core.security import create_access_token
+from app.models.user import User
+from app.models.post import Post
+from app.models.comment import Comment
+from app.models.vote import Vote
+
+
+async def voter(client: httpx.AsyncClient, token: str, target: dict, rounds: int, rng: random.Random):
+    headers = {"Authorization": f"Bearer {token}"}
+    for _ in range(rounds):
+        body = dict(target, vote_type=rng.choice([1, -1]))
+        requests = [client.post("/votes/", json=body, headers=headers)]
+        if rng.random() < 0.2:
+            # Double click: the same vote sent twice at once
+            requests.append(client.post("/votes/", json=body, headers=headers))
+        for response in await asyncio.gather(*requests):
+            assert response.status_code == 200, response.text
+
+
+async def run(targets: list, tokens: list, rounds: int):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=60) as client:
+        rng = random.Random(42)
+        await asyncio.gather(*[
+            voter(client, token, target, rounds, random.Random(rng.random()))
+            for token in tokens
+            for target in targets
+        ])
+
+
+def counts_match(db, model, key, target_id: int) -> bool:
+    row = db.query(model).filter(model.id == target_id).first()
+    up = db.query(func.count(Vote.id)).filter(key == target_id, Vote.vote_type == 1).scalar()
+    down = db.query(func.count(Vote.id)).filter(key == target_id, Vote.vote_type == -1).scalar()
+    ok = (row.upvotes, row.downvotes) == (up, down)
+    mark = "✅" if ok else "❌"
+    print(f"{mark} {model.__name__} {target_id}: cached {row.upvotes}/{row.downvotes}, votes table {up}/{down}")
+    return ok
+
+
+def verify_vote_concurrency(n_users: int = 20, rounds: int = 10):
+    print(f"Verifying vote counters under concurrency ({n_users} users x {rounds} rounds)...")
+    tmpdir = tempfile.mkdtemp()
+    session.init_db(f"sqlite:///{tmpdir}/verify.db")
+    session.create_tables()
+
+    db = session.SessionLocal()
+    users = [User(email=f"voter{i}@example.com", username=f"voter{i}", full_name=f"Voter {i}") for i in range(n_users)]
+    db.add_all(users)
+    db.commit()
+    post = Post(title="Hot post", content="Vote on me", department="CS", author_id=users[0].id)
+    db.add(post)
+    db.commit()
+    comment = Comment(content="Me too", post_id=post.id, author_id=users[0].id)
+    db.add(comment)
+    db.commit()
+    post_id, comment_id = post.id, comment.id
+    tokens = [create_access_token({"sub": u.email}) for u in users]
+    db.close()
+
+    asyncio.run(run([{"post_id": post_id}, {"comment_id": comment_id}], tokens, rounds))
+
+    db = session.SessionLocal()
+    ok = counts_match(db, Post, Vote.post_id, post_id)
+    ok = counts_match(db, Comment, Vote.comment_id, comment_id) and ok
+    db.close()
+    session.close_db()
+    return ok
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    sys.exit(0 if verify_vote_concurrency(*args) else 1)